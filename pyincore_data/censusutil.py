@@ -4,23 +4,46 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
-import requests
+import json
+import multiprocessing
 import os
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-import urllib.request
-import shutil
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import cached_property, lru_cache
+from io import BytesIO, StringIO
+from urllib.parse import quote
 from pyincore import Dataset
-from zipfile import ZipFile
 
 from pyincore_data.censusviz import CensusViz
+from pyincore_data.config import Config
+from pyincore_data.utils.cacheutil import CacheUtil
+from pyincore_data.utils.datasetutil import DataFrameDataset
 from pyincore_data.utils.datautil import DataUtil
+from pyincore_data.utils.fipsutil import FipsUtil
+from pyincore_data.utils.geoutil import GeoUtil
+from pyincore_data.utils.httputil import HttpUtil
+from pyincore_data.utils.jsonutil import JsonUtil
 from pyincore_data import globals as pyincore_globals
 
 logger = pyincore_globals.LOGGER
 
 
+@lru_cache(maxsize=None)
+def _get_decode_context():
+    # The fetch threads and the pooled http connections are running, so the decode workers must not be forked.
+    # The forkserver preload list is process wide, so it is only extended once, with this module.
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+
+    mp_context = multiprocessing.get_context("forkserver")
+    mp_context.set_forkserver_preload([__name__])
+
+    return mp_context
+
+
 class CensusUtil:
     """Utility methods for Census data and API"""
 
@@ -33,6 +56,9 @@ class CensusUtil:
         columns: str = None,
         geo_type: str = None,
         data_name: str = None,
+        in_memory: bool = False,
+        typed: bool = False,
+        stream: bool = False,
     ):
         """Create json and pandas DataFrame for census api request result.
 
@@ -45,6 +71,12 @@ class CensusUtil:
                 e.g, 'GEO_ID,NAME,P005001,P005003,P005004,P005010'
             geo_type (str): Name of geo area. e.g, 'tract:*' or 'block%20group:*'
             data_name (str): Optional for getting different dataset. e.g, 'component'
+            in_memory (bool): Back the dataset by a dataframe instead of saving a csv in the current directory.
+                The dataset frame matches the csv read back, and a csv is only written to a temporary
+                directory if the dataset file is read.
+            typed (bool): Convert the dataframe columns to compact dtypes using the census variable metadata.
+            stream (bool): Decode the response incrementally to reduce peak memory of large requests.
+                The json list is not kept and None is returned in its place.
 
         Returns:
             dict, obj, obj: A json list, a dataframe for census api result,
@@ -56,7 +88,19 @@ class CensusUtil:
             state, county, year, data_source, columns, geo_type, data_name
         )
 
-        api_json, api_df = CensusUtil.request_census_api(data_url)
+        api_json, api_df = CensusUtil.request_census_api(
+            data_url, typed=typed, stream=stream
+        )
+
+        if in_memory:
+            # parse the frame back from an in-memory csv, so the dataset has the same columns and dtypes
+            # as the csv dataset below
+            csv_buffer = StringIO()
+            api_df.to_csv(csv_buffer)
+            csv_buffer.seek(0)
+            out_dataset = DataFrameDataset(pd.read_csv(csv_buffer), data_type="ergo:censusdata", name="api")
+
+            return api_json, api_df, out_dataset
 
         # convert df to dataset
         timestr = time.strftime("%Y%m%d-%H%M%S")
@@ -128,34 +172,358 @@ class CensusUtil:
         return data_url
 
     @staticmethod
-    def request_census_api(data_url):
+    def plan_census_queries(variables, max_variables: int = None):
+        """Pack census variables into as few api requests as the variable limit allows.
+
+        Args:
+            variables (list): Census variable names. Duplicates are requested once.
+            max_variables (int): Maximum number of variables per request.
+                Defaults to globals.CENSUS_API_MAX_VARIABLES.
+
+        Returns:
+            list: A list of variable lists, one per request.
+
+        """
+        if max_variables is None:
+            max_variables = pyincore_globals.CENSUS_API_MAX_VARIABLES
+
+        unique_variables = list(dict.fromkeys(variables))
+
+        return [
+            unique_variables[i: i + max_variables]
+            for i in range(0, len(unique_variables), max_variables)
+        ]
+
+    @staticmethod
+    def get_census_data_by_variables(
+        state: str = None,
+        county: str = None,
+        year: str = None,
+        data_source: str = None,
+        variables: list = None,
+        geo_type: str = None,
+        data_name: str = None,
+        typed: bool = False,
+        stream: bool = False,
+    ):
+        """Create pandas DataFrame for any number of census variables of the same geography.
+
+        The variables are split into the fewest requests allowed by the census api variable limit
+        and the responses are joined on their geography columns, e.g. state, county, tract.
+
+        Args:
+            state (str): A string of state FIPS with comma separated format. e.g, '41, 42' or '*'
+            county (str): A string of county FIPS with comma separated format. e.g, '017,029,045,091,101' or '*'
+            year (str): Census Year.
+            data_source (str): Census dataset name. Can be found from https://api.census.gov/data.html
+            variables (list): Census variable names. e.g, ['GEO_ID', 'B03002_001E', 'B03002_003E']
+            geo_type (str): Name of geo area. e.g, 'tract:*' or 'block%20group:*'
+            data_name (str): Optional for getting different dataset. e.g, 'component'
+            typed (bool): Convert the dataframe columns to compact dtypes using the census variable metadata.
+            stream (bool): Decode the responses incrementally to reduce peak memory of large requests.
+
+        Returns:
+            obj: A dataframe with the requested variables and the geography columns
+
+        """
+        api_df = None
+        for query_variables in CensusUtil.plan_census_queries(variables):
+            data_url = CensusUtil.generate_census_api_url(
+                state,
+                county,
+                year,
+                data_source,
+                ",".join(query_variables),
+                geo_type,
+                data_name,
+            )
+            query_df = CensusUtil.request_census_api(
+                data_url, typed=typed, stream=stream
+            )[1]
+
+            if api_df is None:
+                api_df = query_df
+            else:
+                # geography columns are returned in addition to the requested variables
+                geo_columns = [
+                    column for column in query_df.columns if column not in query_variables
+                ]
+                api_df = pd.merge(api_df, query_df, on=geo_columns, how="inner")
+
+        return api_df
+
+    @staticmethod
+    def get_census_cache():
+        """Get the local cache used for census api responses.
+
+        Returns:
+            obj: A CacheUtil configured by the CENSUS_CACHE_* settings in Config.
+
+        """
+        return CacheUtil(
+            "census",
+            max_size=Config.CENSUS_CACHE_MAX_SIZE,
+            ttl=Config.CENSUS_CACHE_TTL,
+        )
+
+    @staticmethod
+    def request_census_api(
+        data_url,
+        use_cache: bool = None,
+        offline: bool = None,
+        typed: bool = False,
+        stream: bool = False,
+    ):
         """Request census data to api and gets the output data
 
+        Responses are kept in a local cache keyed by the normalized url, so repeated requests
+        for the same data are served from disk instead of the census api.
+
         Args:
             data_url (str): url for obtaining the data from census api
+            use_cache (bool): Read and write the local response cache. Defaults to Config.CENSUS_CACHE_ENABLED.
+            offline (bool): Only use the local cache and never call the census api.
+                Defaults to Config.CENSUS_CACHE_OFFLINE.
+            typed (bool): Convert the dataframe columns to compact dtypes using the census variable metadata
+                instead of keeping every value as a string. See coerce_census_dtypes.
+            stream (bool): Decode the response incrementally into column buffers instead of loading
+                the whole json document. The json list is not kept and None is returned in its place.
+                With typed, the columns are converted block by block while decoding.
         Returns:
             dict, object: A json list and a dataframe for census api result
 
         """
-        # Obtain Census API JSON Data
-        request_json = requests.get(data_url)
+        if use_cache is None:
+            use_cache = Config.CENSUS_CACHE_ENABLED
+        if offline is None:
+            offline = Config.CENSUS_CACHE_OFFLINE
+
+        cache = CensusUtil.get_census_cache()
+        cache_key = CacheUtil.normalize_url(data_url)
+        # streamed typed responses are converted while decoding and cached separately
+        typed_stream = stream and typed
+        if typed_stream:
+            cache_key += "#typed"
+
+        def get_types(columns):
+            return CensusUtil.get_variable_types(data_url.split("?")[0], list(columns), offline=offline)
+
+        api_json = None
+        api_df = None
+        if use_cache or offline:
+            cached_file = cache.get(cache_key, "parquet")
+            if cached_file is not None:
+                logger.debug("Census API data from cache: " + cached_file)
+                api_df = pd.read_parquet(cached_file)
+                if not stream:
+                    api_json = [list(api_df.columns)] + api_df.astype(object).where(
+                        api_df.notna(), None
+                    ).values.tolist()
+
+        if api_df is None:
+            if offline:
+                error_msg = "Census API data is not available in the local cache: " + data_url
+                logger.error(error_msg)
+                raise Exception(error_msg)
 
-        if request_json.status_code != 200:
-            error_msg = "Failed to download the data from Census API. Please check your parameters."
-            # logger.error(error_msg)
-            raise Exception(error_msg)
+            # Obtain Census API JSON Data
+            request_json = HttpUtil.get(data_url, stream=stream)
 
-        # Convert the requested json into pandas dataframe
+            if request_json.status_code != 200:
+                request_json.close()
+                error_msg = "Failed to download the data from Census API. Please check your parameters."
+                # logger.error(error_msg)
+                raise Exception(error_msg)
 
-        api_json = request_json.json()
-        api_df = pd.DataFrame(columns=api_json[0], data=api_json[1:])
+            # Convert the requested json into pandas dataframe
+            if stream:
+                with request_json:
+                    api_df = CensusUtil.read_census_json_stream(
+                        request_json.iter_content(chunk_size=1024 * 1024),
+                        variable_types=get_types if typed_stream else None,
+                    )
+            else:
+                api_json = request_json.json()
+                api_df = pd.DataFrame(columns=api_json[0], data=api_json[1:])
+
+            if use_cache:
+                try:
+                    cache.put(
+                        cache_key,
+                        "parquet",
+                        lambda path: api_df.to_parquet(path, compression="zstd", index=False),
+                        url=data_url,
+                    )
+                except (OSError, ValueError, TypeError) as e:
+                    logger.warning("Failed to cache Census API data: " + str(e))
+
+        if typed and not typed_stream:
+            api_df = CensusUtil.coerce_census_dtypes(api_df, get_types(api_df.columns))
 
         return api_json, api_df
 
+    @staticmethod
+    def read_census_json_stream(chunks, block_size: int = 65536, variable_types=None):
+        """Create pandas DataFrame from a census api json response without loading the whole document.
+
+        Rows are decoded one by one into preallocated column buffers, which are reused for every
+        block of rows. Without variable_types the blocks keep the values as strings. With
+        variable_types the numeric columns of each block are converted with coerce_census_dtypes
+        before the blocks are concatenated, so the whole table is never held as strings.
+        Geography columns become categoricals once the whole table is read.
+
+        Args:
+            chunks (iterable): Text or utf-8 byte chunks of the response, e.g. response.iter_content().
+            block_size (int): Number of rows decoded into the column buffers before they are converted.
+            variable_types (dict or function): Predicate types of the columns, see get_variable_types,
+                or a function returning them for the list of column names of the response.
+
+        Returns:
+            obj: A dataframe for census api result
+
+        """
+        rows = JsonUtil.iter_array_items(chunks)
+        columns = next(rows)
+        buffers = [np.empty(block_size, dtype=object) for _ in columns]
+        if callable(variable_types):
+            variable_types = variable_types(columns)
+        # categories are only known for the whole table, these columns stay strings until the end
+        category_columns = []
+        if variable_types is not None:
+            category_columns = [column for column in columns if column in variable_types
+                                and variable_types[column] is None]
+            variable_types = {column: "string" if column in category_columns else predicate_type
+                              for column, predicate_type in variable_types.items()}
+
+        def to_block(length):
+            block = pd.DataFrame(dict(zip(columns, [b[:length].copy() for b in buffers])))
+            if variable_types is not None:
+                block = CensusUtil.coerce_census_dtypes(block, variable_types)
+            return block
+
+        blocks = []
+        num_rows = 0
+        for row in rows:
+            for buffer, value in zip(buffers, row):
+                buffer[num_rows] = value
+            num_rows += 1
+            if num_rows == block_size:
+                blocks.append(to_block(num_rows))
+                num_rows = 0
+
+        if num_rows > 0 or not blocks:
+            blocks.append(to_block(num_rows))
+        del buffers
+
+        api_df = pd.concat(blocks, ignore_index=True)
+        del blocks
+        for column in category_columns:
+            api_df[column] = api_df[column].astype("category")
+
+        return api_df
+
+    @staticmethod
+    def get_variable_types(base_url, variables, offline: bool = None):
+        """Get the predicate types of census variables from the census api variable metadata.
+
+        The metadata of each variable is requested once and kept in the local census cache.
+
+        Args:
+            base_url (str): Census dataset url. e.g, 'https://api.census.gov/data/2020/acs/acs5'
+            variables (list): Census variable names.
+            offline (bool): Only use the local cache. Defaults to Config.CENSUS_CACHE_OFFLINE.
+
+        Returns:
+            dict: A dictionary of variable name and predicate type, e.g. 'int', 'float' or 'string'.
+                The type is None for names that are not census variables, e.g. geography columns.
+
+        """
+        if offline is None:
+            offline = Config.CENSUS_CACHE_OFFLINE
+
+        cache = CensusUtil.get_census_cache()
+
+        def _variable_type(variable):
+            variable_url = f"{base_url}/variables/{quote(variable)}.json"
+            cache_key = CacheUtil.normalize_url(variable_url)
+            cached_file = cache.get(cache_key, "json", allow_expired=True)
+            if cached_file is not None:
+                with open(cached_file, "r") as f:
+                    return json.load(f).get("predicateType")
+            if offline:
+                logger.warning("Census variable metadata is not available in the local cache: " + variable)
+                return "string"
+
+            response = HttpUtil.get(variable_url)
+            if response.status_code == 200:
+                variable_meta = response.json()
+            elif response.status_code == 404:
+                # geography columns such as state or tract are not census variables
+                variable_meta = {}
+            else:
+                logger.warning("Failed to get Census variable metadata: " + variable)
+                return "string"
+
+            def _write_meta(path):
+                with open(path, "w") as f:
+                    json.dump(variable_meta, f)
+
+            try:
+                cache.put(cache_key, "json", _write_meta)
+            except OSError as e:
+                logger.warning("Failed to cache Census variable metadata: " + str(e))
+
+            return variable_meta.get("predicateType")
+
+        with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as executor:
+            variable_types = dict(zip(variables, executor.map(_variable_type, variables)))
+
+        return variable_types
+
+    @staticmethod
+    def coerce_census_dtypes(api_df, variable_types):
+        """Convert census api string columns to compact dtypes.
+
+        Integer variables become nullable Int32, or Int64 if the values do not fit, float variables
+        become float32 when that loses no precision, and annotation values (globals.CENSUS_NULL_VALUES)
+        become missing values. Columns that are not census variables, e.g. state, county, tract or
+        block group, become categoricals so the codes keep their leading zeros.
+
+        Args:
+            api_df (obj): A dataframe from census api.
+            variable_types (dict): A dictionary of column name and predicate type, see get_variable_types.
+
+        Returns:
+            obj: A dataframe with converted columns.
+
+        """
+        out_df = pd.DataFrame(index=api_df.index)
+        for column in api_df.columns:
+            predicate_type = variable_types.get(column, "string")
+            values = api_df[column]
+
+            if predicate_type in ("int", "float"):
+                values = pd.to_numeric(values, errors="coerce")
+                values = values.mask(values.isin(pyincore_globals.CENSUS_NULL_VALUES))
+                if predicate_type == "int":
+                    int32 = np.iinfo(np.int32)
+                    fits_int32 = values.dropna().between(int32.min, int32.max).all()
+                    values = values.astype("Int32" if fits_int32 else "Int64")
+                else:
+                    values = pd.to_numeric(values, downcast="float")
+            elif predicate_type is None:
+                values = values.astype("category")
+
+            out_df[column] = values
+
+        return out_df
+
     @staticmethod
     def get_fips_by_state_county(state: str, county: str, year: str = 2010):
         """Get FIPS code by using state and county name.
 
+        The county list of the census year is downloaded once and looked up from the local gazetteer.
+
         Args:
             state (str): State name. e.g, 'illinois'
             county (str): County name. e.g, 'champaign'
@@ -164,20 +532,10 @@ class CensusUtil:
             str: A string of FIPS code
 
         """
-        api_url = f"https://api.census.gov/data/{year}/dec/sf1?get=NAME&for=county:*"
-        out_fips = None
-        api_json = requests.get(api_url)
-        query_value = county + " County, " + state
-        if api_json.status_code != 200:
-            error_msg = "Failed to download the data from Census API. Please look up Google for getting the FIPS code."
-            raise Exception(error_msg)
-
-        # content_json = api_json.json()
-        df = pd.DataFrame(columns=api_json.json()[0], data=api_json.json()[1:])
-        selected_row = df.loc[df["NAME"].str.lower() == query_value.lower()]
-        if selected_row.size > 0:
-            out_fips = selected_row.iloc[0]["state"] + selected_row.iloc[0]["county"]
-        else:
+        out_fips = FipsUtil.get_county_fips(
+            state, county, base_url=f"https://api.census.gov/data/{year}/dec/sf1"
+        )
+        if out_fips is None:
             error_msg = "There is no FIPS code for given state and county combination."
             logger.error(error_msg)
             raise Exception(error_msg)
@@ -195,15 +553,20 @@ class CensusUtil:
             obj: A json list of county FIPS code in the given state
 
         """
-        api_url = f"https://api.census.gov/data/{year}/dec/sf1?get=NAME&for=county:*"
-        api_json = requests.get(api_url)
-        if api_json.status_code != 200:
-            error_msg = "Failed to download the data from Census API."
-            logger.error(error_msg)
-            raise Exception(error_msg)
+        county_table = FipsUtil.get_county_table(
+            base_url=f"https://api.census.gov/data/{year}/dec/sf1"
+        )
 
-        # content_json = api_json.json()
-        out_fips = api_json.json()
+        # same layout as the census api response
+        out_fips = [["NAME", "state", "county"]] + [
+            [county_name + ", " + state_name, state_fips, county_fips]
+            for county_name, state_name, state_fips, county_fips in zip(
+                county_table["county_name"],
+                county_table["state_name"],
+                county_table["state"],
+                county_table["county"],
+            )
+        ]
 
         return out_fips
 
@@ -218,6 +581,10 @@ class CensusUtil:
         out_html: bool = False,
         geo_name: str = "geo_name",
         program_name: str = "program_name",
+        max_workers: int = None,
+        out_map: bool = True,
+        out_geoparquet: bool = False,
+        dataset_format: str = None,
     ):
         """Create Geopandas DataFrame for population dislocation analysis from census dataset.
 
@@ -232,12 +599,72 @@ class CensusUtil:
             out_html (bool): Save processed folium map to html.
             geo_name (str): Name of geo area - used for naming output files.
             program_name (str): Name of directory used to save output files.
+            max_workers (int): Maximum number of concurrent Census API requests and shapefile downloads.
+                Defaults to Config.MAX_WORKERS.
+            out_map (bool): Create the ipyleaflet map. If False, None is returned instead of the map.
+            out_geoparquet (bool): Save processed census geodataframe as GeoParquet.
+            dataset_format (str): Format of the file backing the returned dataset when it is written,
+                'gpkg' or 'shp'. Defaults to 'gpkg'. The dataset format is 'geopackage' or 'shapefile' to match.
 
         Returns:
             obj, dict, obj: A dataframe for dislocation analysis,
             a dictionary containing geodataframe and folium map, and
             a dataset object created by downloaded geo data
 
+        """
+        dislocation_data = CensusUtil.create_blockgroupdata_for_dislocation(
+            state_counties, vintage, dataset_name, geo_name, program_name, max_workers, dataset_format
+        )
+
+        # only the requested outputs are written, the dataset is backed by the geodataframe
+        if out_html:
+            dislocation_data.save_html()
+
+        if out_csv:
+            dislocation_data.save_csv()
+
+        if out_shapefile:
+            dislocation_data.save_shapefile()
+
+        if out_geopackage:
+            dislocation_data.save_geopackage()
+
+        if out_geoparquet:
+            dislocation_data.save_geoparquet()
+
+        # ### Explore Data - Map merged block group shapefile and Census data
+        bgmap = dislocation_data.map if out_map else None
+
+        return dislocation_data.dataframe, bgmap, dislocation_data.dataset
+
+    @staticmethod
+    def create_blockgroupdata_for_dislocation(
+        state_counties: list,
+        vintage: str = "2010",
+        dataset_name: str = "dec/sf1",
+        geo_name: str = "geo_name",
+        program_name: str = "program_name",
+        max_workers: int = None,
+        dataset_format: str = None,
+    ):
+        """Get block group data for population dislocation analysis with lazily created outputs.
+
+        Only the Census data and the block group geometries are fetched and merged. The map,
+        the output files and the dataset are created on demand from the returned DislocationData.
+
+        Args:
+            state_counties (list): A List of concatenated State and County FIPS Codes.
+            vintage (str): Census Year.
+            dataset_name (str): Census dataset name.
+            geo_name (str): Name of geo area - used for naming output files.
+            program_name (str): Name of directory used to save output files.
+            max_workers (int): Maximum number of concurrent Census API requests and shapefile downloads.
+                Defaults to Config.MAX_WORKERS.
+            dataset_format (str): Format of the file backing the dataset, 'gpkg' or 'shp'. Defaults to 'gpkg'.
+
+        Returns:
+            obj: A DislocationData holding the merged census data and block groups.
+
         """
         # Variable parameters
         get_vars = "GEO_ID,NAME,P005001,P005003,P005004,P005010"
@@ -250,17 +677,8 @@ class CensusUtil:
         # P005004 = Total!!Not Hispanic or Latino!!Black or African American alone
         # P005010 = Total!!Hispanic or Latino
 
-        # Make directory to save output
-        if not os.path.exists(program_name):
-            os.mkdir(program_name)
-
-        # Make a directory to save downloaded shapefiles - folder will be made then deleted
-        shapefile_dir = "shapefiletemp"
-        if not os.path.exists(shapefile_dir):
-            os.mkdir(shapefile_dir)
-
-        # loop through counties
-        appended_countydata = []  # start an empty container for the county data
+        # Set up hyperlinks for Census API
+        api_hyperlinks = []
         for state_county in state_counties:
             # deconcatenate state and county values
             state = state_county[0:2]
@@ -268,18 +686,32 @@ class CensusUtil:
             logger.debug("State:  " + state)
             logger.debug("County: " + county)
 
-            # Set up hyperlink for Census API
             api_hyperlink = CensusUtil.generate_census_api_url(
                 state, county, vintage, dataset_name, get_vars, "block%20group"
             )
-
             logger.info("Census API data from: " + api_hyperlink)
+            api_hyperlinks.append(api_hyperlink)
+
+        # Request Census API data and download county shapefiles concurrently.
+        # Results are collected in the order of state_counties to keep the output deterministic
+        with ThreadPoolExecutor(max_workers=max_workers or Config.MAX_WORKERS) as executor:
+            api_futures = [
+                executor.submit(CensusUtil.request_census_api, api_hyperlink)
+                for api_hyperlink in api_hyperlinks
+            ]
+            shp_futures = [
+                executor.submit(CensusUtil.download_county_shapefile, state_county)
+                for state_county in state_counties
+            ]
 
-            # Obtain Census API JSON Data
-            apijson, apidf = CensusUtil.request_census_api(api_hyperlink)
-            print(apidf.size)
             # Append county data makes it possible to have multiple counties
-            appended_countydata.append(apidf)
+            appended_countydata = []  # start an empty container for the county data
+            for api_future in api_futures:
+                apijson, apidf = api_future.result()
+                logger.debug("Census API data size: " + str(apidf.size))
+                appended_countydata.append(apidf)
+
+            appended_countyshp = [shp_future.result() for shp_future in shp_futures]
 
         # Create dataframe from appended county data
         cen_blockgroup = pd.concat(appended_countydata, ignore_index=True)
@@ -317,10 +749,6 @@ class CensusUtil:
             cen_blockgroup["P005010"] / cen_blockgroup["P005001"] * 100
         )
 
-        appended_countyshp = CensusUtil.download_couty_shapefile(
-            state_counties, shapefile_dir
-        )
-
         # Create dataframe from appended county data
         shp_blockgroup = pd.concat(appended_countyshp)
 
@@ -333,81 +761,72 @@ class CensusUtil:
             how="left",
         )
 
-        # Set paramaters for file save
-        save_columns = [
-            "bgid",
-            "bgidstr",
-            "Survey",
-            "pblackbg",
-            "phispbg",
-        ]  # set column names to save
-
-        # ### Explore Data - Map merged block group shapefile and Census data
+        return DislocationData(cen_blockgroup, cen_shp_blockgroup_merged, program_name, geo_name, dataset_format)
 
-        bgmap = CensusViz.create_dislocation_ipyleaflet_map_from_gpd(
-            cen_shp_blockgroup_merged
-        )
+    @staticmethod
+    def get_factor_variables(factors):
+        """Get the census variables needed to compute factors.
 
-        savefile = program_name + "_" + geo_name  # set file name
+        Args:
+            factors (dict): Factor definitions, see globals.DEMOGRAPHIC_FACTORS.
 
-        if out_html:
-            folium_map = CensusViz.create_dislocation_folium_map_from_gpd(
-                cen_shp_blockgroup_merged
-            )
-            CensusViz.save_dislocation_map_to_html(
-                folium_map["map"], program_name, savefile
-            )
+        Returns:
+            list: A list of unique census variable names.
 
-        if out_csv:
-            DataUtil.convert_dislocation_pd_to_csv(
-                cen_blockgroup, save_columns, program_name, savefile
-            )
+        """
+        variables = []
+        for factor in factors.values():
+            variables += factor["numerator"] + [factor["denominator"]]
 
-        if out_shapefile:
-            DataUtil.convert_dislocation_gpd_to_shapefile(
-                cen_shp_blockgroup_merged, program_name, savefile
-            )
+        return list(dict.fromkeys(variables))
 
-        if out_geopackage:
-            DataUtil.convert_dislocation_gpd_to_geopackage(
-                cen_shp_blockgroup_merged, program_name, savefile
-            )
+    @staticmethod
+    def compute_factors(df, factors, aggregate: bool = False):
+        """Compute ratio factors from census variables as whole column operations.
 
-        if not out_shapefile:
-            DataUtil.convert_dislocation_gpd_to_shapefile(
-                cen_shp_blockgroup_merged, program_name, savefile
-            )
+        Census annotation values (globals.CENSUS_NULL_VALUES) are treated as missing and
+        a zero denominator gives NaN instead of infinity.
 
-        # convert df to dataset
-        out_dataset = Dataset.from_file(
-            program_name + "/" + savefile + ".shp", data_type="ergo:censusdata"
-        )
-        out_dataset.format = "shapefile"
-        out_dataset.metadata["format"] = "shapefile"
+        Args:
+            df (obj): A dataframe with the census variables of each factor.
+            factors (dict): Factor definitions, see globals.DEMOGRAPHIC_FACTORS.
+            aggregate (bool): Compute a single ratio of the column sums instead of one ratio per row.
+                Rows missing the numerator or the denominator are left out of both sums.
 
-        # clean up shapefile temp directory
-        # Try to remove tree; if failed show an error using try...except on screen
-        try:
-            shutil.rmtree(shapefile_dir)
-            if (
-                not out_shapefile
-                and not out_csv
-                and not out_html
-                and not out_geopackage
-            ):
-                shutil.rmtree(program_name)
-        except OSError:
-            error_msg = (
-                "Error: Failed to remove either "
-                + shapefile_dir
-                + " or "
-                + program_name
-                + " directory"
-            )
-            logger.error(error_msg)
-            raise Exception(error_msg)
+        Returns:
+            dict: A dictionary of factor name and numpy array, or float if aggregate is True.
 
-        return cen_blockgroup[save_columns], bgmap, out_dataset
+        """
+        values = {}
+        for variable in CensusUtil.get_factor_variables(factors):
+            column = df[variable]
+            if not pd.api.types.is_numeric_dtype(column):
+                try:
+                    column = column.astype("float64")
+                except (ValueError, TypeError):
+                    column = pd.to_numeric(column, errors="coerce")
+            column = column.to_numpy(dtype="float64", na_value=np.nan, copy=True)
+            column[np.isin(column, pyincore_globals.CENSUS_NULL_VALUES)] = np.nan
+            values[variable] = column
+
+        out_factors = {}
+        for name, factor in factors.items():
+            numerator = np.sum([values[variable] for variable in factor["numerator"]], axis=0)
+            denominator = values[factor["denominator"]]
+            if aggregate:
+                # only rows with both values contribute to the sums
+                valid = ~(np.isnan(numerator) | np.isnan(denominator))
+                numerator = np.sum(numerator[valid])
+                denominator = np.sum(denominator[valid])
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(denominator != 0, numerator / denominator, np.nan)
+            if factor.get("complement", False):
+                ratio = 1 - ratio
+
+            out_factors[name] = ratio.item() if aggregate else ratio
+
+        return out_factors
 
     @staticmethod
     def demographic_factors(state_code, county_code, year, geo_type="tract:*"):
@@ -423,127 +842,25 @@ class CensusUtil:
             obj: A dataframe  of population demographics for a particular county
 
         """
+        factors = dict(pyincore_globals.DEMOGRAPHIC_FACTORS)
+        factors["factor_without_disability_age_18_to_65"] = pyincore_globals.DISABILITY_FACTORS[geo_type]
 
-        df_1 = CensusUtil.get_census_data(
-            state=state_code,
-            county=county_code,
-            year=year,
-            data_source="acs/acs5",
-            columns="GEO_ID,B03002_001E,B03002_003E",
-            geo_type=geo_type,
-        )[1]
-        df_1["factor_white_nonHispanic"] = (
-            df_1[["B03002_001E", "B03002_003E"]]
-            .astype(int)
-            .apply(lambda row: row["B03002_003E"] / row["B03002_001E"], axis=1)
-        )
-
-        df_2 = CensusUtil.get_census_data(
-            state=state_code,
-            county=county_code,
-            year=year,
-            data_source="acs/acs5",
-            columns="B25003_001E,B25003_002E",
-            geo_type=geo_type,
-        )[1]
-        df_2["factor_owner_occupied"] = df_2.astype(int).apply(
-            lambda row: row["B25003_002E"] / row["B25003_001E"], axis=1
-        )
-
-        df_3 = CensusUtil.get_census_data(
-            state=state_code,
-            county=county_code,
-            year=year,
-            data_source="acs/acs5",
-            columns="B17021_001E,B17021_002E",
-            geo_type=geo_type,
-        )[1]
-        df_3["factor_earning_higher_than_national_poverty_rate"] = df_3.astype(
-            int
-        ).apply(lambda row: 1 - row["B17021_002E"] / row["B17021_001E"], axis=1)
-
-        df_4 = CensusUtil.get_census_data(
+        # all variables are requested together and joined on the geography columns
+        df = CensusUtil.get_census_data_by_variables(
             state=state_code,
             county=county_code,
             year=year,
             data_source="acs/acs5",
-            columns="B15003_001E,B15003_017E,B15003_018E,B15003_019E,B15003_020E,"
-            "B15003_021E,B15003_022E,B15003_023E,B15003_024E,B15003_025E",
+            variables=["GEO_ID"] + CensusUtil.get_factor_variables(factors),
             geo_type=geo_type,
-        )[1]
-        df_4["factor_over_25_with_high_school_diploma_or_higher"] = df_4.astype(
-            int
-        ).apply(
-            lambda row: (
-                row["B15003_017E"]
-                + row["B15003_018E"]
-                + row["B15003_019E"]
-                + row["B15003_020E"]
-                + row["B15003_021E"]
-                + row["B15003_022E"]
-                + row["B15003_023E"]
-                + row["B15003_024E"]
-                + row["B15003_025E"]
-            )
-            / row["B15003_001E"],
-            axis=1,
         )
 
-        if geo_type == "tract:*":
-            df_5 = CensusUtil.get_census_data(
-                state=state_code,
-                county=county_code,
-                year=year,
-                data_source="acs/acs5",
-                columns="B18101_001E,B18101_011E,B18101_014E,B18101_030E,B18101_033E",
-                geo_type=geo_type,
-            )[1]
-            df_5["factor_without_disability_age_18_to_65"] = df_5.astype(int).apply(
-                lambda row: (
-                    row["B18101_011E"]
-                    + row["B18101_014E"]
-                    + row["B18101_030E"]
-                    + row["B18101_033E"]
-                )
-                / row["B18101_001E"],
-                axis=1,
-            )
-
-        elif geo_type == "block%20group:*":
-            df_5 = CensusUtil.get_census_data(
-                state=state_code,
-                county=county_code,
-                year=year,
-                data_source="acs/acs5",
-                columns="B01003_001E,C21007_006E,C21007_009E,C21007_013E,C21007_016E",
-                geo_type=geo_type,
-            )[1]
-
-            df_5["factor_without_disability_age_18_to_65"] = df_5.astype(int).apply(
-                lambda row: (
-                    row["C21007_006E"]
-                    + row["C21007_006E"]
-                    + row["C21007_009E"]
-                    + row["C21007_013E"]
-                )
-                / row["C21007_016E"],
-                axis=1,
-            )
-
-        df_t = pd.concat(
-            [
-                df_1[["GEO_ID", "factor_white_nonHispanic"]],
-                df_2["factor_owner_occupied"],
-                df_3["factor_earning_higher_than_national_poverty_rate"],
-                df_4["factor_over_25_with_high_school_diploma_or_higher"],
-                df_5["factor_without_disability_age_18_to_65"],
-            ],
-            axis=1,
-            join="inner",
-        )
+        df_t = df[["GEO_ID"]].copy()
+        for name, factor in CensusUtil.compute_factors(df, factors).items():
+            df_t[name] = factor
 
         # extract FIPS from geo id
-        df_t["FIPS"] = df_t.apply(lambda row: row["GEO_ID"].split("US")[1], axis=1)
+        df_t["FIPS"] = df_t["GEO_ID"].str.split("US", n=1).str[1]
 
         return df_t
 
@@ -559,168 +876,436 @@ class CensusUtil:
             list: A list of dictionaries denoting population demographics for the nation
 
         """
+        factors = pyincore_globals.NATIONAL_AVERAGE_FACTORS
 
-        nav1 = CensusUtil.get_census_data(
-            state="*",
-            county=None,
-            year=year,
-            data_source=data_source,
-            columns="B03002_001E,B03002_003E",
-            geo_type=None,
-        )[1]
-        nav1 = nav1.astype(int)
-        nav1_avg = {
-            "feature": "NAV-1: White, nonHispanic",
-            "average": nav1["B03002_003E"].sum() / nav1["B03002_001E"].sum(),
-        }
-
-        nav2 = CensusUtil.get_census_data(
-            state="*",
-            county=None,
-            year=year,
-            data_source=data_source,
-            columns="B25003_001E,B25003_002E",
-            geo_type=None,
-        )[1]
-        nav2 = nav2.astype(int)
-        nav2_avg = {
-            "feature": "NAV-2: Home Owners",
-            "average": nav2["B25003_002E"].sum() / nav2["B25003_001E"].sum(),
-        }
-
-        nav3 = CensusUtil.get_census_data(
+        # all variables are requested together and joined on the state column
+        nav = CensusUtil.get_census_data_by_variables(
             state="*",
             county=None,
             year=year,
             data_source=data_source,
-            columns="B17021_001E,B17021_002E",
-            geo_type=None,
-        )[1]
-        nav3 = nav3.astype(int)
-        nav3_avg = {
-            "feature": "NAV-3: earning higher than national poverty rate",
-            "average": 1 - nav3["B17021_002E"].sum() / nav3["B17021_001E"].sum(),
-        }
-
-        nav4 = CensusUtil.get_census_data(
-            state="*",
-            county=None,
-            year=year,
-            data_source="acs/acs5",
-            columns="B15003_001E,B15003_017E,B15003_018E,B15003_019E,B15003_020E,"
-            "B15003_021E,B15003_022E,B15003_023E,B15003_024E,B15003_025E",
+            variables=CensusUtil.get_factor_variables(factors),
             geo_type=None,
-        )[1]
-        nav4 = nav4.astype(int)
-        nav4["temp"] = nav4.apply(
-            lambda row: row["B15003_017E"]
-            + row["B15003_018E"]
-            + row["B15003_019E"]
-            + row["B15003_020E"]
-            + row["B15003_021E"]
-            + row["B15003_022E"]
-            + row["B15003_023E"]
-            + row["B15003_024E"]
-            + row["B15003_025E"],
-            axis=1,
         )
-        nav4_avg = {
-            "feature": "NAV-4: over 25 with high school diploma or higher",
-            "average": nav4["temp"].sum() / nav4["B15003_001E"].sum(),
-        }
 
-        nav5 = CensusUtil.get_census_data(
-            state="*",
-            county=None,
-            year=year,
-            data_source=data_source,
-            columns="B18101_001E,B18101_011E,B18101_014E,B18101_030E,B18101_033E",
-            geo_type=None,
-        )[1]
-        nav5 = nav5.astype(int)
-        nav5["temp"] = nav5.apply(
-            lambda row: row["B18101_011E"]
-            + row["B18101_014E"]
-            + row["B18101_030E"]
-            + row["B18101_033E"],
-            axis=1,
-        )
-        nav5_avg = {
-            "feature": "NAV-5: without disability age 18 to 65",
-            "average": nav5["temp"].sum() / nav5["B18101_001E"].sum(),
-        }
-
-        navs = [nav1_avg, nav2_avg, nav3_avg, nav4_avg, nav5_avg]
+        navs = [
+            {"feature": feature, "average": average}
+            for feature, average in CensusUtil.compute_factors(nav, factors, aggregate=True).items()
+        ]
 
         return navs
 
     @staticmethod
-    def download_couty_shapefile(state_county_list, download_dir):
-        """Download and extract shapefiles for selected counties.
+    def download_couty_shapefile(
+        state_county_list,
+        download_dir=None,
+        max_workers: int = None,
+        columns: list = None,
+        bbox: tuple = None,
+        parallel: bool = False,
+        max_processes: int = None,
+        use_cache: bool = None,
+    ):
+        """Download shapefiles for selected counties.
 
         Args:
             state_county_list (list): A list of concatenated State and County FIPS Codes.
                 see full list https://www.nrcs.usda.gov/wps/portal/nrcs/detail/national/home/?cid=nrcs143_013697
-            download_dir (str): Directory to save downloaded shapefiles.
+            download_dir (str): Not used anymore since the shapefiles are read in memory. Kept for compatibility.
+            max_workers (int): Maximum number of concurrent downloads. Defaults to Config.MAX_WORKERS.
+            columns (list): Names of the attribute columns to read. None reads all columns.
+            bbox (tuple): Only read block groups intersecting (minx, miny, maxx, maxy) in longitude and latitude.
+            parallel (bool): Decode and reproject the counties in a process pool instead of the download threads.
+            max_processes (int): Number of worker processes in parallel mode. Defaults to Config.MAX_PROCESSES.
+            use_cache (bool): Read and write the local geometry cache. Defaults to Config.TIGER_CACHE_ENABLED.
 
         Returns:
             list: A list of GeoPandas GeoDataFrames containing block groups for all of the selected counties.
 
         """
-        # ### Obtain Data - Download and extract shapefiles
+        # ### Obtain Data - Download shapefiles
         # The Block Group IDs in the Census data are associated with the Block Group boundaries that can be mapped.
         # To map this data, we need the shapefile information for the block groups in the select counties.
         #
         # These files can be found online at:
         # https://www2.census.gov/geo/tiger/TIGER2010/BG/2010/
 
-        # ### Download and extract shapefiles
+        # ### Download shapefiles
         # Block group shapefiles are downloaded for each of the selected counties from
         # the Census TIGER/Line Shapefiles at https://www2.census.gov/geo/tiger.
-        # Each counties file is downloaded as a zipfile and the contents are extracted.
+        # Each counties file is downloaded as a zipfile and read without extracting it.
         # The shapefiles are reprojected to EPSG 4326 and appended as a single shapefile
         # (as a GeoPandas GeoDataFrame) containing block groups for all the selected counties.
         #
         # *EPSG: 4326 uses a coordinate system (Lat, Lon)
         # This coordinate system is required for mapping with folium.
+        if parallel:
+            return CensusUtil.decode_county_shapefiles_parallel(
+                state_county_list,
+                max_workers=max_workers,
+                max_processes=max_processes,
+                use_cache=use_cache,
+                columns=columns,
+                bbox=bbox,
+            )
+
+        # map keeps the order of the counties
+        with ThreadPoolExecutor(max_workers=max_workers or Config.MAX_WORKERS) as executor:
+            appended_countyshp = list(
+                executor.map(
+                    lambda state_county: CensusUtil.download_county_shapefile(
+                        state_county, use_cache=use_cache, columns=columns, bbox=bbox
+                    ),
+                    state_county_list,
+                )
+            )
+
+        return appended_countyshp
+
+    @staticmethod
+    def load_county_shapefiles(
+        state_county_list,
+        max_workers: int = None,
+        columns: list = None,
+        bbox: tuple = None,
+        parallel: bool = False,
+        max_processes: int = None,
+        use_cache: bool = None,
+    ):
+        """Load block groups of selected counties into a single GeoDataFrame.
+
+        Args:
+            state_county_list (list): A list of concatenated State and County FIPS Codes.
+            max_workers (int): Maximum number of concurrent downloads. Defaults to Config.MAX_WORKERS.
+            columns (list): Names of the attribute columns to read. None reads all columns.
+            bbox (tuple): Only read block groups intersecting (minx, miny, maxx, maxy) in longitude and latitude.
+            parallel (bool): Decode and reproject the counties in a process pool.
+            max_processes (int): Number of worker processes in parallel mode. Defaults to Config.MAX_PROCESSES.
+            use_cache (bool): Read and write the local geometry cache. Defaults to Config.TIGER_CACHE_ENABLED.
+
+        Returns:
+            obj: A GeoPandas GeoDataFrame containing block groups of all the selected counties in EPSG 4326.
 
-        appended_countyshp = []  # start an empty container for the county shapefiles
+        """
+        appended_countyshp = CensusUtil.download_couty_shapefile(
+            state_county_list,
+            max_workers=max_workers,
+            columns=columns,
+            bbox=bbox,
+            parallel=parallel,
+            max_processes=max_processes,
+            use_cache=use_cache,
+        )
+
+        # concat once instead of growing the frame county by county
+        return gpd.GeoDataFrame(pd.concat(appended_countyshp, ignore_index=True), crs="EPSG:4326")
+
+    @staticmethod
+    def get_tiger_cache():
+        """Get the local cache used for reprojected TIGER geometries.
+
+        Returns:
+            obj: A CacheUtil configured by the TIGER_CACHE_* settings in Config.
+
+        """
+        return CacheUtil("tiger", max_size=Config.TIGER_CACHE_MAX_SIZE)
+
+    @staticmethod
+    def get_county_shapefile_url(state_county):
+        """Get url of the TIGER 2010 block group shapefile of a county.
+
+        Args:
+            state_county (str): Concatenated State and County FIPS Code.
+
+        Returns:
+            str: Url of the zipped shapefile.
+
+        """
+        # county_fips = state+county
+        filename = f"tl_2010_{state_county}_bg10"
+
+        return "https://www2.census.gov/geo/tiger/TIGER2010/BG/2010/" + filename + ".zip"
+
+    @staticmethod
+    def fetch_county_shapefile(state_county):
+        """Download the zipped block group shapefile of a county into memory.
+
+        Args:
+            state_county (str): Concatenated State and County FIPS Code.
+
+        Returns:
+            bytes: Content of the zip file.
+
+        """
+        # Download the TIGER Shapefile for a county
+        shapefile_url = CensusUtil.get_county_shapefile_url(state_county)
+        print(
+            "Downloading Shapefiles for State_County: "
+            + state_county
+            + " from: "
+            + shapefile_url
+        )
+
+        response = HttpUtil.get(shapefile_url)
+        response.raise_for_status()
+
+        return response.content
+
+    @staticmethod
+    def decode_county_shapefile(source, columns: list = None, bbox: tuple = None):
+        """Decode block groups of a county and reproject them to EPSG 4326.
+
+        This is the cpu bound part of loading a county. It only takes picklable arguments,
+        so it can run in a worker process.
+
+        Args:
+            source (obj): Content of the zipped shapefile as bytes, or path of a cached GeoParquet file.
+            columns (list): Names of the attribute columns to read. None reads all columns.
+            bbox (tuple): Only read block groups intersecting bbox. Only used for zipped shapefiles.
+
+        Returns:
+            obj: A GeoPandas GeoDataFrame in EPSG 4326.
+
+        """
+        if isinstance(source, str):
+            # cached geometries are already in EPSG 4326
+            return gpd.read_parquet(source, columns=None if columns is None else list(columns) + ["geometry"])
+
+        # Read zipped shapefile to GeoDataFrame
+        gdf = gpd.read_file(BytesIO(source), engine="pyogrio", columns=columns, bbox=bbox)
 
-        # loop through counties
-        for state_county in state_county_list:
-            # county_fips = state+county
-            filename = f"tl_2010_{state_county}_bg10"
+        # Set projection to EPSG 4326, which is required for folium
+        return GeoUtil.to_crs(gdf, 4326)
 
-            # Use wget to download the TIGER Shapefile for a county
-            # options -quiet = turn off wget output
-            # add directory prefix to save files to folder named after program name
-            shapefile_url = (
-                "https://www2.census.gov/geo/tiger/TIGER2010/BG/2010/"
-                + filename
-                + ".zip"
+    @staticmethod
+    def cache_county_shapefile(cache, state_county, gdf):
+        """Store reprojected block groups of a county in the geometry cache.
+
+        Args:
+            cache (obj): CacheUtil of the TIGER geometries.
+            state_county (str): Concatenated State and County FIPS Code.
+            gdf (obj): GeoPandas GeoDataFrame with all columns in EPSG 4326.
+
+        """
+        try:
+            cache.put(
+                f"tiger/2010/bg10/{state_county}",
+                "parquet",
+                lambda path: gdf.to_parquet(path, compression="zstd", index=False),
+                url=CensusUtil.get_county_shapefile_url(state_county),
             )
-            print(
-                (
-                    "Downloading Shapefiles for State_County: "
-                    + state_county
-                    + " from: "
-                    + shapefile_url
-                ).format(filename=filename)
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to cache shapefile: " + str(e))
+
+    @staticmethod
+    def download_county_shapefile(
+        state_county,
+        download_dir=None,
+        use_cache: bool = None,
+        columns: list = None,
+        bbox: tuple = None,
+    ):
+        """Download block group shapefile for a single county.
+
+        The zipped shapefile is read directly from memory, so nothing is extracted to disk.
+        TIGER 2010 boundaries do not change, so the reprojected block groups are kept in a local
+        GeoParquet cache keyed by vintage, level and FIPS code and later runs skip the download.
+
+        Args:
+            state_county (str): Concatenated State and County FIPS Code.
+            download_dir (str): Not used anymore since the shapefile is read in memory. Kept for compatibility.
+            use_cache (bool): Read and write the local geometry cache. Defaults to Config.TIGER_CACHE_ENABLED.
+            columns (list): Names of the attribute columns to read. None reads all columns.
+            bbox (tuple): Only read block groups intersecting (minx, miny, maxx, maxy) in longitude and latitude.
+
+        Returns:
+            obj: A GeoPandas GeoDataFrame containing block groups of the county in EPSG 4326.
+
+        """
+        if use_cache is None:
+            use_cache = Config.TIGER_CACHE_ENABLED
+
+        cache = CensusUtil.get_tiger_cache()
+        cached_file = cache.get(f"tiger/2010/bg10/{state_county}", "parquet") if use_cache else None
+        if cached_file is not None:
+            logger.debug("Shapefile for State_County: " + state_county + " from cache: " + cached_file)
+            gdf = CensusUtil.decode_county_shapefile(cached_file, columns=columns)
+        elif use_cache:
+            # The cached copy keeps every column and block group
+            gdf = CensusUtil.decode_county_shapefile(CensusUtil.fetch_county_shapefile(state_county))
+            CensusUtil.cache_county_shapefile(cache, state_county, gdf)
+            if columns is not None:
+                gdf = gdf[list(columns) + ["geometry"]]
+        else:
+            # Without the cache the column selection and bounding box are pushed down to the reader
+            return CensusUtil.decode_county_shapefile(
+                CensusUtil.fetch_county_shapefile(state_county), columns=columns, bbox=bbox
             )
 
-            zip_file = os.path.join(download_dir, filename + ".zip")
-            urllib.request.urlretrieve(shapefile_url, zip_file)
+        if bbox is not None:
+            gdf = gdf.cx[bbox[0]: bbox[2], bbox[1]: bbox[3]]
 
-            with ZipFile(zip_file, "r") as zip_obj:
-                zip_obj.extractall(path="shapefiletemp")
+        return gdf
 
-            # Read shapefile to GeoDataFrame
-            gdf = gpd.read_file(f"shapefiletemp/{filename}.shp")
+    @staticmethod
+    def decode_county_shapefiles_parallel(
+        state_county_list,
+        max_workers: int = None,
+        max_processes: int = None,
+        use_cache: bool = None,
+        columns: list = None,
+        bbox: tuple = None,
+    ):
+        """Load block groups of counties with downloads in threads and decoding in a process pool.
 
-            # Set projection to EPSG 4326, which is required for folium
-            gdf = gdf.to_crs(epsg=4326)
+        Downloads and cache lookups run in a thread pool and every county is handed to the process
+        pool as soon as its zip file arrives, so decoding and reprojection overlap with the downloads
+        and use all cores. The workers use the forkserver start method, or spawn where it is not
+        available, and the first call adds this module to the process wide forkserver preload list.
 
-            # Append county data
-            appended_countyshp.append(gdf)
+        Args:
+            state_county_list (list): A list of concatenated State and County FIPS Codes.
+            max_workers (int): Maximum number of concurrent downloads. Defaults to Config.MAX_WORKERS.
+            max_processes (int): Number of worker processes. Defaults to Config.MAX_PROCESSES or the cpu count.
+            use_cache (bool): Read and write the local geometry cache. Defaults to Config.TIGER_CACHE_ENABLED.
+            columns (list): Names of the attribute columns to read. None reads all columns.
+            bbox (tuple): Only read block groups intersecting (minx, miny, maxx, maxy) in longitude and latitude.
+
+        Returns:
+            list: A list of GeoPandas GeoDataFrames in the order of state_county_list.
+
+        """
+        if use_cache is None:
+            use_cache = Config.TIGER_CACHE_ENABLED
+
+        cache = CensusUtil.get_tiger_cache()
+
+        def fetch(state_county):
+            if use_cache:
+                cached_file = cache.get(f"tiger/2010/bg10/{state_county}", "parquet")
+                if cached_file is not None:
+                    return cached_file, columns, None
+                # The cached copy keeps every column and block group
+                return CensusUtil.fetch_county_shapefile(state_county), None, None
+
+            return CensusUtil.fetch_county_shapefile(state_county), columns, bbox
+
+        with ProcessPoolExecutor(
+            max_workers=max_processes or Config.MAX_PROCESSES or None, mp_context=_get_decode_context()
+        ) as processes:
+            with ThreadPoolExecutor(max_workers=max_workers or Config.MAX_WORKERS) as executor:
+                fetch_futures = {
+                    executor.submit(fetch, state_county): index
+                    for index, state_county in enumerate(state_county_list)
+                }
+                decode_futures = [None] * len(state_county_list)
+                from_cache = [False] * len(state_county_list)
+                for fetch_future in as_completed(fetch_futures):
+                    index = fetch_futures[fetch_future]
+                    source, read_columns, read_bbox = fetch_future.result()
+                    from_cache[index] = isinstance(source, str)
+                    decode_futures[index] = processes.submit(
+                        CensusUtil.decode_county_shapefile, source, read_columns, read_bbox
+                    )
+
+            appended_countyshp = []
+            for state_county, decode_future, cached in zip(state_county_list, decode_futures, from_cache):
+                gdf = decode_future.result()
+                if use_cache:
+                    if not cached:
+                        CensusUtil.cache_county_shapefile(cache, state_county, gdf)
+                        if columns is not None:
+                            gdf = gdf[list(columns) + ["geometry"]]
+                    if bbox is not None:
+                        gdf = gdf.cx[bbox[0]: bbox[2], bbox[1]: bbox[3]]
+                appended_countyshp.append(gdf)
 
         return appended_countyshp
+
+
+class DislocationData:
+    """Block group data for population dislocation analysis with lazily evaluated outputs.
+
+    The dataframe is available right away. The ipyleaflet map, the folium map and the dataset
+    are created on first access, and files are only written by the save methods.
+
+    Args:
+        cen_blockgroup (obj): Pandas DataFrame with the census data of the block groups.
+        geodataframe (obj): GeoPandas GeoDataFrame with the census data merged to the block groups.
+        program_name (str): Name of directory used to save output files.
+        geo_name (str): Name of geo area - used for naming output files.
+        dataset_format (str): Format of the file backing the dataset, 'gpkg' or 'shp'. Defaults to 'gpkg'.
+
+    """
+
+    # columns of the dataframe for dislocation analysis
+    save_columns = ["bgid", "bgidstr", "Survey", "pblackbg", "phispbg"]
+
+    def __init__(
+        self, cen_blockgroup, geodataframe, program_name="program_name", geo_name="geo_name", dataset_format=None
+    ):
+        self.cen_blockgroup = cen_blockgroup
+        self.geodataframe = geodataframe
+        self.program_name = program_name
+        self.geo_name = geo_name
+        self.dataset_format = dataset_format or "gpkg"
+
+    @property
+    def savefile(self):
+        """str: Output file name without extension."""
+        return self.program_name + "_" + self.geo_name
+
+    @property
+    def dataframe(self):
+        """obj: Pandas DataFrame for dislocation analysis."""
+        return self.cen_blockgroup[self.save_columns]
+
+    @cached_property
+    def map(self):
+        """obj: ipyleaflet map of the block groups, created on first access."""
+        return CensusViz.create_dislocation_ipyleaflet_map_from_gpd(self.geodataframe)
+
+    @cached_property
+    def folium_map(self):
+        """dict: Folium map of the block groups, created on first access."""
+        return CensusViz.create_dislocation_folium_map_from_gpd(self.geodataframe)
+
+    @cached_property
+    def dataset(self):
+        """obj: Dataset backed by the geodataframe, labelled with the format of dataset_format.
+
+        Its file is only written when a reader asks for it.
+        """
+        return DataFrameDataset(
+            self.geodataframe, data_type="ergo:censusdata", name=self.savefile, file_format=self.dataset_format
+        )
+
+    def _make_output_dir(self):
+        os.makedirs(self.program_name, exist_ok=True)
+
+    def save_csv(self):
+        """Save the dataframe for dislocation analysis as csv in the program directory."""
+        self._make_output_dir()
+        DataUtil.convert_dislocation_pd_to_csv(
+            self.cen_blockgroup, self.save_columns, self.program_name, self.savefile
+        )
+
+    def save_shapefile(self):
+        """Save the geodataframe as shapefile in the program directory."""
+        self._make_output_dir()
+        DataUtil.convert_dislocation_gpd_to_shapefile(self.geodataframe, self.program_name, self.savefile)
+
+    def save_geopackage(self):
+        """Save the geodataframe as geopackage in the program directory."""
+        self._make_output_dir()
+        DataUtil.convert_dislocation_gpd_to_geopackage(self.geodataframe, self.program_name, self.savefile)
+
+    def save_geoparquet(self):
+        """Save the geodataframe as GeoParquet in the program directory."""
+        self._make_output_dir()
+        DataUtil.convert_dislocation_gpd_to_geoparquet(self.geodataframe, self.program_name, self.savefile)
+
+    def save_html(self):
+        """Save the folium map as html in the program directory."""
+        self._make_output_dir()
+        CensusViz.save_dislocation_map_to_html(self.folium_map["map"], self.program_name, self.savefile)
@@ -5,6 +5,7 @@
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
 # configs file
+import json
 import os
 from dotenv import load_dotenv
 
@@ -22,9 +23,55 @@ class Config:
     DB_NAME = os.getenv('DB_NAME')
     DB_USERNAME = os.getenv('DB_USERNAME')
     DB_PASSWORD = os.getenv('DB_PASSWORD')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    # number of rows sent per COPY when bulk loading
+    DB_COPY_CHUNK_SIZE = int(os.getenv('DB_COPY_CHUNK_SIZE', '100000'))
 
     # NSI parameters
     NSI_URL_STATE = os.getenv('NSI_URL_STATE', 'https://nsi.sec.usace.army.mil/downloads/nsi_2022/')
     NSI_PREFIX = os.getenv('NSI_PREFIX', 'nsi_2022_')
     NSI_URL_FIPS = os.getenv('NSI_URL_FIPS', 'https://nsi.sec.usace.army.mil/nsiapi/structures?fips=')
-    NSI_URL_FIPS_INTERNAL = os.getenv('NSI_URL_FIPS_INTERNAL', 'https://nsi.sec.usace.army.mil/internal/nsiapi/structures?fips=')
+    NSI_URL_FIPS_INTERNAL = os.getenv('NSI_URL_FIPS_INTERNAL',
+                                      'https://nsi.sec.usace.army.mil/internal/nsiapi/structures?fips=')
+
+    # http transport parameters
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '5'))
+    HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '120'))
+    HTTP_DOWNLOAD_CHUNK_SIZE = int(os.getenv('HTTP_DOWNLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+    # read timeout in seconds per host, e.g. '{"api.census.gov": 60}'
+    HTTP_HOST_TIMEOUTS = json.loads(os.getenv('HTTP_HOST_TIMEOUTS', json.dumps({
+        'api.census.gov': 60,
+        'www2.census.gov': 120,
+        'nsi.sec.usace.army.mil': 600,
+    })))
+
+    # maximum number of concurrent requests for multi county downloads
+    MAX_WORKERS = int(os.getenv('PYINCORE_DATA_MAX_WORKERS', '8'))
+
+    # number of worker processes for cpu bound geometry decoding and reprojection, 0 uses the cpu count
+    MAX_PROCESSES = int(os.getenv('PYINCORE_DATA_MAX_PROCESSES', '0'))
+
+    # local cache parameters
+    CACHE_DIR = os.getenv('PYINCORE_DATA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.incore', 'pyincore-data'))
+    CENSUS_CACHE_ENABLED = os.getenv('CENSUS_CACHE_ENABLED', 'true').lower() == 'true'
+    CENSUS_CACHE_OFFLINE = os.getenv('CENSUS_CACHE_OFFLINE', 'false').lower() == 'true'
+    CENSUS_CACHE_MAX_SIZE = int(os.getenv('CENSUS_CACHE_MAX_SIZE', str(1024 ** 3)))
+    CENSUS_CACHE_TTL = float(os.getenv('CENSUS_CACHE_TTL')) if os.getenv('CENSUS_CACHE_TTL') else None
+    TIGER_CACHE_ENABLED = os.getenv('TIGER_CACHE_ENABLED', 'true').lower() == 'true'
+    TIGER_CACHE_MAX_SIZE = int(os.getenv('TIGER_CACHE_MAX_SIZE', str(2 * 1024 ** 3)))
+    NSI_CACHE_ENABLED = os.getenv('NSI_CACHE_ENABLED', 'true').lower() == 'true'
+    NSI_CACHE_MAX_SIZE = int(os.getenv('NSI_CACHE_MAX_SIZE', str(4 * 1024 ** 3)))
+    # entries older than the ttl are revalidated with the NSI service, 30 days by default
+    NSI_CACHE_TTL = float(os.getenv('NSI_CACHE_TTL', str(30 * 24 * 3600)))
+    # read NSI counties from the DB_* database before the NSI service and write fetched counties back
+    NSI_DB_CACHE_ENABLED = os.getenv('NSI_DB_CACHE_ENABLED', 'false').lower() == 'true'
+    # partitioned table of the county upserts, separate from the nsi_raw table of the bulk loads
+    NSI_DB_TABLE = os.getenv('NSI_DB_TABLE', 'nsi_structures')
+
+    # GeoParquet output parameters
+    GEOPARQUET_COMPRESSION = os.getenv('GEOPARQUET_COMPRESSION', 'zstd')
+    GEOPARQUET_ROW_GROUP_SIZE = int(os.getenv('GEOPARQUET_ROW_GROUP_SIZE', '65536'))
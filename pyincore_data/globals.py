@@ -31,4 +31,70 @@ STATE_FIPS_CODES = {
     "Virginia": "51", "Washington": "53", "West Virginia": "54", "Wisconsin": "55", "Wyoming": "56"
 }
 
+# District of Columbia and territories, which are not part of STATE_FIPS_CODES
+TERRITORY_FIPS_CODES = {
+    "District of Columbia": "11", "American Samoa": "60", "Guam": "66", "Northern Mariana Islands": "69",
+    "Puerto Rico": "72", "United States Virgin Islands": "78"
+}
+
+# county equivalents of the island areas, which are not served by the census county api
+ISLAND_AREA_COUNTY_NAMES = {
+    "60010": "Eastern District", "60020": "Manu'a District", "60030": "Rose Island", "60040": "Swains Island",
+    "60050": "Western District", "66010": "Guam", "69085": "Northern Islands Municipality",
+    "69100": "Rota Municipality", "69110": "Saipan Municipality", "69120": "Tinian Municipality",
+    "78010": "St. Croix Island", "78020": "St. John Island", "78030": "St. Thomas Island"
+}
+
 COUNTY_FIPS_BASE_URL = "https://api.census.gov/data/2020/acs/acs5"
+
+# maximum number of variables in a single census api request
+CENSUS_API_MAX_VARIABLES = 50
+
+# annotation values returned by the census api in place of an estimate, e.g. -666666666 when
+# the estimate could not be computed because there were too few sample observations
+CENSUS_NULL_VALUES = [-999999999, -888888888, -666666666, -555555555, -333333333, -222222222]
+
+# demographic factors defined as the sum of the numerator variables divided by the denominator variable.
+# complement factors are 1 minus that ratio
+_EDUCATION_VARIABLES = ["B15003_0%dE" % i for i in range(17, 26)]
+DEMOGRAPHIC_FACTORS = {
+    "factor_white_nonHispanic": {
+        "numerator": ["B03002_003E"],
+        "denominator": "B03002_001E",
+    },
+    "factor_owner_occupied": {
+        "numerator": ["B25003_002E"],
+        "denominator": "B25003_001E",
+    },
+    "factor_earning_higher_than_national_poverty_rate": {
+        "numerator": ["B17021_002E"],
+        "denominator": "B17021_001E",
+        "complement": True,
+    },
+    "factor_over_25_with_high_school_diploma_or_higher": {
+        "numerator": _EDUCATION_VARIABLES,
+        "denominator": "B15003_001E",
+    },
+}
+
+# disability factor uses different tables for tracts and block groups
+DISABILITY_FACTORS = {
+    "tract:*": {
+        "numerator": ["B18101_011E", "B18101_014E", "B18101_030E", "B18101_033E"],
+        "denominator": "B18101_001E",
+    },
+    "block%20group:*": {
+        "numerator": ["C21007_006E", "C21007_006E", "C21007_009E", "C21007_013E"],
+        "denominator": "C21007_016E",
+    },
+}
+
+NATIONAL_AVERAGE_FACTORS = {
+    "NAV-1: White, nonHispanic": DEMOGRAPHIC_FACTORS["factor_white_nonHispanic"],
+    "NAV-2: Home Owners": DEMOGRAPHIC_FACTORS["factor_owner_occupied"],
+    "NAV-3: earning higher than national poverty rate":
+        DEMOGRAPHIC_FACTORS["factor_earning_higher_than_national_poverty_rate"],
+    "NAV-4: over 25 with high school diploma or higher":
+        DEMOGRAPHIC_FACTORS["factor_over_25_with_high_school_diploma_or_higher"],
+    "NAV-5: without disability age 18 to 65": DISABILITY_FACTORS["tract:*"],
+}
@@ -4,100 +4,380 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
+import os
 import pandas as pd
 import geopandas as gpd
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from pyarrow import ArrowException
+from requests import RequestException
+from sqlalchemy.exc import SQLAlchemyError
 
+from pyincore_data.config import Config
 from pyincore_data.utils.datautil import DataUtil
+from pyincore_data.utils.fipsutil import FipsUtil
+from pyincore_data.utils.postgresutil import PostgresUtil
 from pyincore_data import globals as pyincore_globals
 
 # Static mapping of state names to FIPS codes (since the API doesn't directly return them in this case)
 STATE_FIPS_CODES = pyincore_globals.STATE_FIPS_CODES
 
+logger = pyincore_globals.LOGGER
+
+# tables that can not be used as NSI database cache because they are not partitioned
+_unpartitioned_tables = set()
+
 
 class NsiParser:
     @staticmethod
-    def create_nsi_gdf_by_county_fips(in_fips):
+    def create_nsi_gdf_by_county_fips(in_fips, out_geoparquet=None, use_cache=None, refresh=False, use_db=None):
         """
         Creates a GeoDataFrame by NSI data for a county FIPS codes.
 
         Args:
             in_fips (Str): A county FIPS code (e.g., '29001').
+            out_geoparquet (str): Optional path of a GeoParquet file to save the GeoDataFrame to.
+            use_cache (bool): Read and write the local NSI cache. Defaults to Config.NSI_CACHE_ENABLED.
+            refresh (bool): Revalidate the cached structures with the NSI service even if they are not expired.
+            use_db (bool): Read the county from the PostgreSQL database first and write it back if it was
+                missing. Defaults to Config.NSI_DB_CACHE_ENABLED.
 
         Returns:
             gpd.GeoDataFrame: A GeoDataFrame containing data for provided FIPS codes.
         """
-        # get feature collection from NIS api
-        gdf = DataUtil.get_features_by_fips(in_fips)
+        if use_db is None:
+            use_db = Config.NSI_DB_CACHE_ENABLED
+
+        gdf = None
+        if use_db and not refresh:
+            gdf = NsiParser.read_nsi_counties_from_db([in_fips]).get(in_fips)
+
+        if gdf is None:
+            # get feature collection from NIS api
+            gdf = DataUtil.get_features_by_fips(in_fips, use_cache=use_cache, refresh=refresh)
+            if use_db:
+                NsiParser.write_nsi_counties_to_db({in_fips: gdf})
+
+        if out_geoparquet is not None:
+            DataUtil.gdf_to_geoparquet(gdf, out_geoparquet)
 
         return gdf
 
     @staticmethod
-    def create_nsi_gdf_by_counties_fips_list(fips_list):
+    def create_nsi_gdf_by_counties_fips_list(
+        fips_list, out_geoparquet=None, max_workers=None, use_cache=None, refresh=False, state_dir=None, use_db=None
+    ):
         """
         Creates a merged GeoDataFrame by fetching and combining NSI data for a list of county FIPS codes.
 
+        Counties are fetched concurrently and concatenated once. Counties that fail are reported
+        and skipped instead of aborting the run.
+
         Args:
             fips_list (list): A list of county FIPS codes (e.g., ['15005', '29001']).
+            out_geoparquet (str): Optional path of a GeoParquet file to save the merged GeoDataFrame to.
+            max_workers (int): Maximum number of concurrent county requests. Defaults to Config.MAX_WORKERS.
+            use_cache (bool): Read and write the local NSI cache. Defaults to Config.NSI_CACHE_ENABLED.
+            refresh (bool): Revalidate the cached structures with the NSI service even if they are not expired.
+            state_dir (str): Directory of state files from DataUtil.download_nsi_data_state_file.
+                Counties of states with a downloaded file are read locally instead of from the NSI service.
+            use_db (bool): Read the counties from the PostgreSQL database first and write the missing ones
+                back. Defaults to Config.NSI_DB_CACHE_ENABLED.
 
         Returns:
             gpd.GeoDataFrame: A merged GeoDataFrame containing data for all provided FIPS codes.
+                The FIPS codes of failed counties are listed in merged_gdf.attrs['failed_fips'].
         """
-        # initialize an empty GeoDataFrame
-        merged_gdf = gpd.GeoDataFrame()
+        gdfs, failures = NsiParser.fetch_nsi_gdfs_by_counties(
+            fips_list, max_workers, use_cache, refresh, state_dir, use_db
+        )
 
-        for fips in fips_list:
-            print(f"Processing FIPS: {fips}")
-            gdf = DataUtil.get_features_by_fips(fips)
+        for fips, error in failures.items():
+            print(f"Failed to fetch NSI data for FIPS {fips}: {error}")
 
-            if gdf is not None and not gdf.empty:
-                merged_gdf = gpd.GeoDataFrame(pd.concat([merged_gdf, gdf], ignore_index=True))
+        gdfs = [gdf for gdf in gdfs if gdf is not None and not gdf.empty]
+        if not gdfs:
+            merged_gdf = gpd.GeoDataFrame()
+        else:
+            # concat once instead of copying the merged rows for every county
+            merged_gdf = gpd.GeoDataFrame(pd.concat(gdfs, ignore_index=True))
+            # ensure CRS consistency in the merged GeoDataFrame
+            merged_gdf = merged_gdf.set_crs(epsg=4326, allow_override=True)
 
-        # ensure CRS consistency in the merged GeoDataFrame
-        if not merged_gdf.empty:
-            merged_gdf = merged_gdf.set_crs(epsg=4326)
+            if out_geoparquet is not None:
+                DataUtil.gdf_to_geoparquet(merged_gdf, out_geoparquet)
+
+        merged_gdf.attrs["failed_fips"] = list(failures)
 
         return merged_gdf
 
     @staticmethod
-    def get_county_fips_by_state(state_name):
+    def fetch_nsi_gdfs_by_counties(
+        fips_list, max_workers=None, use_cache=None, refresh=False, state_dir=None, use_db=None
+    ):
         """
-        Fetches all county FIPS codes for a given state using the US Census Bureau API.
+        Fetches NSI data for a list of county FIPS codes with bounded concurrency.
 
         Args:
-            state_name (str): Full state name (e.g., "Illinois").
+            fips_list (list): A list of county FIPS codes (e.g., ['15005', '29001']).
+            max_workers (int): Maximum number of concurrent county requests. Defaults to Config.MAX_WORKERS.
+            use_cache (bool): Read and write the local NSI cache. Defaults to Config.NSI_CACHE_ENABLED.
+            refresh (bool): Revalidate the cached structures with the NSI service even if they are not expired.
+            state_dir (str): Directory of state files from DataUtil.download_nsi_data_state_file.
+                Counties of states with a downloaded file are read locally instead of from the NSI service.
+            use_db (bool): Read the counties from the PostgreSQL database first and write the missing ones
+                back. Defaults to Config.NSI_DB_CACHE_ENABLED.
 
         Returns:
-            list: A list of dictionaries containing county names and their FIPS codes.
+            list: GeoDataFrames in the order of fips_list, None for counties that failed.
+            dict: Error messages of the failed counties keyed by FIPS code.
         """
-        # Normalize state name to title case for matching
-        state_name_normalized = state_name.title()
+        if use_db is None:
+            use_db = Config.NSI_DB_CACHE_ENABLED
+
+        db_gdfs = {}
+        if use_db and not refresh:
+            # one indexed query for all counties already in the database
+            db_gdfs = NsiParser.read_nsi_counties_from_db(fips_list)
+
+        local_gdfs = {}
+        failures = {}
+        if state_dir is not None:
+            # one read per state file for all of its counties
+            state_counties = {}
+            for fips in fips_list:
+                if fips in db_gdfs:
+                    continue
+                state_file = NsiParser.get_nsi_state_file_path(fips[:2], state_dir)
+                if os.path.exists(state_file):
+                    state_counties.setdefault(state_file, []).append(fips)
+
+            for state_file, counties in state_counties.items():
+                try:
+                    state_gdf = DataUtil.read_nsi_counties_from_state_file(state_file, counties)
+                except (OSError, ValueError, RuntimeError) as e:
+                    failures.update({fips: str(e) for fips in counties})
+                    continue
+                local_gdfs.update({fips: state_gdf.iloc[0:0] for fips in counties})
+                local_gdfs.update({fips: county_gdf for fips, county_gdf in state_gdf.groupby("fips", observed=True)})
+
+        def fetch(fips):
+            print(f"Processing FIPS: {fips}")
+            try:
+                return DataUtil.get_features_by_fips(fips, use_cache=use_cache, refresh=refresh), None
+            except (RequestException, OSError, ValueError, KeyError, ArrowException) as e:
+                # request, cache and parquet errors fail only this county
+                return None, str(e)
+
+        remote_fips = [
+            fips for fips in fips_list if fips not in db_gdfs and fips not in local_gdfs and fips not in failures
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers or Config.MAX_WORKERS) as executor:
+            results = dict(zip(remote_fips, executor.map(fetch, remote_fips)))
 
-        # Validate the state name and get the state FIPS code
-        state_fips = STATE_FIPS_CODES.get(state_name_normalized)
-        if not state_fips:
-            raise ValueError(f"State '{state_name}' not found. Please check the spelling.")
+        failures.update({fips: error for fips, (_, error) in results.items() if error is not None})
+        local_gdfs.update({fips: gdf for fips, (gdf, error) in results.items() if error is None})
+
+        if use_db and local_gdfs:
+            NsiParser.write_nsi_counties_to_db(local_gdfs)
+
+        local_gdfs.update(db_gdfs)
+        gdfs = [local_gdfs.get(fips) for fips in fips_list]
+
+        return gdfs, failures
+
+    @staticmethod
+    def read_nsi_counties_from_db(fips_list, table=None):
+        """
+        Reads the NSI data of counties from the PostgreSQL database configured by Config.DB_*.
+
+        Only counties loaded with upsert less than Config.NSI_CACHE_TTL ago are returned. If the
+        database can not be reached, no counties are returned so they are fetched from the NSI service.
+        A table that is not partitioned, e.g. one created by DataUtil.upload_postgres_from_gpkg,
+        disables the database cache for the rest of the session.
+
+        Args:
+            fips_list (list): A list of county FIPS codes (e.g., ['15005', '29001']).
+            table (str): Name of the partitioned table. Defaults to Config.NSI_DB_TABLE.
+
+        Returns:
+            dict: GeoDataFrames of the counties found in the database keyed by FIPS code.
+        """
+        table = table or Config.NSI_DB_TABLE
+        if table in _unpartitioned_tables:
+            return {}
+
+        try:
+            try:
+                loaded_fips = PostgresUtil.get_loaded_counties(fips_list, table, max_age=Config.NSI_CACHE_TTL)
+            except ValueError as e:
+                _unpartitioned_tables.add(table)
+                logger.warning("NSI database cache disabled: " + str(e) + " Set NSI_DB_TABLE to another table.")
+                return {}
+            gdfs = PostgresUtil.read_counties(loaded_fips, table)
+        except (SQLAlchemyError, ImportError) as e:
+            print("Failed to read NSI data from the database: " + str(e))
+            return {}
+
+        for fips in gdfs:
+            print("Reading data for " + fips + " from the database")
+
+        return gdfs
+
+    @staticmethod
+    def write_nsi_counties_to_db(county_gdfs, table=None):
+        """
+        Writes the NSI data of counties to the PostgreSQL database configured by Config.DB_*.
+
+        Only the partitions of the given counties are replaced, see PostgresUtil.upsert_counties.
 
-        # Census API URL for county-level data
-        county_fips_url = f"{pyincore_globals.COUNTY_FIPS_BASE_URL}?get=NAME&for=county:*&in=state:{state_fips}"
-        response = requests.get(county_fips_url)
+        Args:
+            county_gdfs (dict): GeoDataFrames keyed by county FIPS code.
+            table (str): Name of the partitioned table. Defaults to Config.NSI_DB_TABLE.
 
-        if response.status_code != 200:
-            raise ValueError(f"Error fetching counties for state '{state_name}': {response.status_code}")
+        Returns:
+            bool: True if all counties were written, False otherwise.
+        """
+        table = table or Config.NSI_DB_TABLE
+        if table in _unpartitioned_tables:
+            return False
 
+        # the database is only a cache, the fetched data is still returned if writing fails
         try:
-            counties_data = response.json()
-        except ValueError:
-            raise ValueError("Failed to parse JSON response for counties.")
+            _, failures = PostgresUtil.upsert_counties(county_gdfs, table)
+        except ValueError as e:
+            print("Failed to write NSI data to the database: " + str(e))
+            return False
+
+        for fips, error in failures.items():
+            print(f"Failed to write NSI data for FIPS {fips} to the database: {error}")
+
+        return not failures
+
+    @staticmethod
+    def upload_nsi_counties_to_postgres(
+        fips_list, table=None, partition_by_county=False, max_workers=None, use_cache=None, refresh=False,
+        state_dir=None
+    ):
+        """
+        Fetches NSI data for a list of county FIPS codes and replaces only these counties in PostgreSQL.
+
+        The table is partitioned by state FIPS, and optionally county FIPS, so refreshing a county
+        does not reload the rest of the table. Counties are loaded concurrently over pooled connections.
+
+        Args:
+            fips_list (list): A list of county FIPS codes (e.g., ['15005', '29001']).
+            table (str): Name of the partitioned table. Defaults to Config.NSI_DB_TABLE.
+            partition_by_county (bool): Sub-partition new state partitions by county FIPS.
+            max_workers (int): Maximum number of concurrent county requests. Defaults to Config.MAX_WORKERS.
+            use_cache (bool): Read and write the local NSI cache. Defaults to Config.NSI_CACHE_ENABLED.
+            refresh (bool): Revalidate the cached structures with the NSI service even if they are not expired.
+            state_dir (str): Directory of state files from DataUtil.download_nsi_data_state_file.
+
+        Returns:
+            list: The FIPS codes of the counties that were not uploaded.
+        """
+        gdfs, failures = NsiParser.fetch_nsi_gdfs_by_counties(
+            fips_list, max_workers, use_cache, refresh, state_dir, use_db=False
+        )
+
+        for fips, error in failures.items():
+            print(f"Failed to fetch NSI data for FIPS {fips}: {error}")
+
+        county_gdfs = {fips: gdf for fips, gdf in zip(fips_list, gdfs) if gdf is not None}
+        if county_gdfs:
+            _, upload_failures = PostgresUtil.upsert_counties(
+                county_gdfs, table or Config.NSI_DB_TABLE, partition_by_county
+            )
+            for fips, error in upload_failures.items():
+                print(f"Failed to upload NSI data for FIPS {fips}: {error}")
+            failures.update(upload_failures)
+
+        return [fips for fips in fips_list if fips in failures]
+
+    @staticmethod
+    def get_nsi_state_file_path(state_fips, state_dir="data"):
+        """
+        Gets the path of a state file downloaded by DataUtil.download_nsi_data_state_file.
+
+        Args:
+            state_fips (str): The state FIPS code (e.g., '15').
+            state_dir (str): Download directory of the state files.
+
+        Returns:
+            str: Path of the zipped state GeoPackage.
+        """
+        return os.path.join(state_dir, Config.NSI_PREFIX + str(state_fips) + ".gpkg.zip")
+
+    @staticmethod
+    def create_nsi_gdf_by_counties_from_state_file(state_file, fips_list, columns=None):
+        """
+        Creates a GeoDataFrame of counties from a downloaded state GeoPackage without network requests.
+
+        Args:
+            state_file (str): Path of the state GeoPackage or its zip file.
+            fips_list (list): A list of county FIPS codes (e.g., ['15001', '15003']).
+            columns (list): Names of the attribute columns to read. None reads all columns.
+
+        Returns:
+            gpd.GeoDataFrame: A GeoDataFrame containing the structures of the counties.
+        """
+        return DataUtil.read_nsi_counties_from_state_file(state_file, fips_list, columns=columns)
+
+    @staticmethod
+    def refresh_nsi_cache(fips_list, max_workers=None):
+        """
+        Revalidates the cached NSI structures of counties and downloads the ones that changed.
+
+        Args:
+            fips_list (list): A list of county FIPS codes (e.g., ['15005', '29001']).
+            max_workers (int): Maximum number of concurrent county requests. Defaults to Config.MAX_WORKERS.
+
+        Returns:
+            list: The FIPS codes of the counties that failed to refresh.
+        """
+        _, failures = NsiParser.fetch_nsi_gdfs_by_counties(fips_list, max_workers, use_cache=True, refresh=True)
+
+        for fips, error in failures.items():
+            print(f"Failed to refresh NSI data for FIPS {fips}: {error}")
+
+        return list(failures)
+
+    @staticmethod
+    def clear_nsi_cache(fips_list=None):
+        """
+        Removes cached NSI structures.
+
+        Args:
+            fips_list (list): A list of county FIPS codes. None removes all cached counties.
+
+        Returns:
+            None
+        """
+        if fips_list is None:
+            DataUtil.clear_nsi_cache()
+        else:
+            for fips in fips_list:
+                DataUtil.clear_nsi_cache(fips)
 
-        # Ensure counties_data is valid
-        if not isinstance(counties_data, list) or len(counties_data) < 2:
-            raise ValueError("Unexpected data format for county FIPS codes.")
+    @staticmethod
+    def get_county_fips_by_state(state_name):
+        """
+        Fetches all county FIPS codes for a given state from the local county gazetteer.
+
+        Args:
+            state_name (str): Full state name (e.g., "Illinois").
+
+        Returns:
+            list: A list of dictionaries containing county names and their FIPS codes.
+        """
+        counties = FipsUtil.get_counties_by_state(state_name)
+        if counties is None:
+            raise ValueError(f"State '{state_name}' not found. Please check the spelling.")
 
         # Extract county names and FIPS codes
         county_list = [
-            {"county": row[0], "fips": f"{state_fips}{row[2]}"}
-            for row in counties_data[1:]  # Skip the header
+            {"county": f"{county_name}, {state}", "fips": fips}
+            for county_name, state, fips in zip(counties["county_name"], counties["state_name"], counties["fips"])
         ]
 
         return county_list
@@ -134,19 +414,12 @@ class NsiParser:
             str: The FIPS code for the specified county.
             None: If the state or county is not found.
         """
-        try:
-            # fetch all counties and their FIPS codes for the state
-            counties = NsiParser.get_county_fips_by_state(state_name)
-
-            # find the county by name
-            for county in counties:
-                county_name_cleaned = county['county'].split(',')[0].replace(" County", "").strip().lower()
-                if county_name_cleaned == county_name.lower():
-                    return county['fips']
+        if FipsUtil.get_state_fips(state_name) is None:
+            print("Error:", f"State '{state_name}' not found. Please check the spelling.")
+            return None
 
-            # if no match is found
+        fips = FipsUtil.get_county_fips(state_name, county_name)
+        if fips is None:
             print(f"County '{county_name}' not found in state '{state_name}'.")
-            return None
-        except ValueError as e:
-            print("Error:", e)
-            return None
+
+        return fips
@@ -4,4 +4,4 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
-from pyincore_data.utils.datautil import DataUtil
\ No newline at end of file
+from pyincore_data.utils.datautil import DataUtil
@@ -0,0 +1,268 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, unquote
+
+from pyincore_data.config import Config
+from pyincore_data import globals as pyincore_globals
+
+logger = pyincore_globals.LOGGER
+
+
+class CacheUtil:
+    """Content-addressed local file cache with size-bounded LRU eviction and optional TTL.
+
+    Each entry is stored as a data file named by the SHA-256 of its key, next to a small meta json file
+    holding the original key, the creation time and any extra metadata. The modification time of the
+    data file is refreshed on every hit so eviction can drop the least recently used entries first.
+
+    Args:
+        namespace (str): Sub directory of the cache root, e.g. 'census'.
+        cache_dir (str): Cache root directory. Defaults to Config.CACHE_DIR.
+        max_size (int): Maximum total size of the namespace in bytes. None disables eviction.
+        ttl (float): Time to live of an entry in seconds. None keeps entries forever.
+
+    """
+
+    def __init__(self, namespace, cache_dir=None, max_size=None, ttl=None):
+        self.namespace = namespace
+        self.cache_dir = os.path.join(cache_dir or Config.CACHE_DIR, namespace)
+        self.max_size = max_size
+        self.ttl = ttl
+
+    @staticmethod
+    def normalize_url(url):
+        """Normalize url so that equivalent requests share the same cache key.
+
+        Scheme and host are lower cased, percent encoding is decoded and the query parameters are sorted.
+
+        Args:
+            url (str): Request url.
+
+        Returns:
+            str: Normalized url.
+
+        """
+        parts = urlsplit(url.strip())
+        query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+        query = "&".join(f"{key}={value}" for key, value in query)
+
+        return urlunsplit(
+            (parts.scheme.lower(), parts.netloc.lower(), unquote(parts.path), query, "")
+        )
+
+    @staticmethod
+    def hash_key(key):
+        """Create content address of a cache key.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            str: Hex digest of the key.
+
+        """
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key, ext):
+        """Get path of the data file for a cache key.
+
+        Args:
+            key (str): Cache key.
+            ext (str): File extension of the data file, e.g. 'parquet'.
+
+        Returns:
+            str: Path of the data file.
+
+        """
+        digest = CacheUtil.hash_key(key)
+
+        return os.path.join(self.cache_dir, digest[:2], digest + "." + ext)
+
+    def _meta_path(self, key):
+        digest = CacheUtil.hash_key(key)
+
+        return os.path.join(self.cache_dir, digest[:2], digest + ".meta.json")
+
+    def get_meta(self, key):
+        """Get metadata stored with a cache key.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            dict: Entry metadata or None if there is no entry.
+
+        """
+        try:
+            with open(self._meta_path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def update_meta(self, key, **meta):
+        """Update metadata of an existing cache entry.
+
+        Args:
+            key (str): Cache key.
+            **meta: Metadata values to set.
+
+        """
+        entry_meta = self.get_meta(key)
+        if entry_meta is None:
+            return
+        entry_meta.update(meta)
+        self._write_meta(key, entry_meta)
+
+    def _write_meta(self, key, meta):
+        meta_path = self._meta_path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(meta_path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def is_expired(self, key):
+        """Check if a cache entry is older than the time to live.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            bool: True if the entry is missing or expired.
+
+        """
+        meta = self.get_meta(key)
+        if meta is None:
+            return True
+        if self.ttl is None:
+            return False
+
+        return time.time() - meta.get("created", 0) > self.ttl
+
+    def get(self, key, ext, allow_expired=False):
+        """Look up the data file of a cache key.
+
+        Args:
+            key (str): Cache key.
+            ext (str): File extension of the data file.
+            allow_expired (bool): Return the entry even if it is older than the time to live.
+
+        Returns:
+            str: Path of the cached data file or None on a miss.
+
+        """
+        path = self.entry_path(key, ext)
+        if not os.path.exists(path):
+            return None
+        if not allow_expired and self.is_expired(key):
+            return None
+
+        # mark as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            return None
+
+        return path
+
+    def put(self, key, ext, writer, **meta):
+        """Store a new cache entry.
+
+        The data is written to a temporary file by the writer and moved into place atomically,
+        so concurrent readers never see a partial entry.
+
+        Args:
+            key (str): Cache key.
+            ext (str): File extension of the data file.
+            writer (function): Function that writes the data to the path given as its only argument.
+            **meta: Extra metadata stored with the entry.
+
+        Returns:
+            str: Path of the cached data file.
+
+        """
+        path = self.entry_path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix="." + ext)
+        os.close(fd)
+        try:
+            writer(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        entry_meta = {"key": key, "created": time.time()}
+        entry_meta.update(meta)
+        self._write_meta(key, entry_meta)
+
+        self.evict()
+
+        return path
+
+    def remove(self, key):
+        """Remove a cache entry.
+
+        Args:
+            key (str): Cache key.
+
+        """
+        digest = CacheUtil.hash_key(key)
+        entry_dir = os.path.join(self.cache_dir, digest[:2])
+        if not os.path.isdir(entry_dir):
+            return
+        for name in os.listdir(entry_dir):
+            if name.split(".")[0] == digest:
+                try:
+                    os.remove(os.path.join(entry_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        """Remove all entries of the cache namespace."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits into max_size."""
+        if self.max_size is None or not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                # skip metadata and files that are still being written
+                if name.endswith(".meta.json") or name.endswith(".tmp") or name.startswith("."):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_size:
+            return
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            base = os.path.splitext(path)[0]
+            for entry_file in (path, base + ".meta.json"):
+                try:
+                    os.remove(entry_file)
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+            logger.debug("Evicted cache entry " + path)
@@ -0,0 +1,109 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import os
+import shutil
+import tempfile
+import weakref
+
+import geopandas as gpd
+from pyincore import Dataset
+
+# metadata format of the written file for each file format
+DATASET_FORMATS = {
+    "gpkg": "geopackage",
+    "shp": "shapefile",
+    "csv": "table",
+}
+
+
+class DataFrameDataset(Dataset):
+    """pyincore Dataset backed by an in-memory DataFrame or GeoDataFrame.
+
+    The frame is handed out directly by get_dataframe_from_csv and get_dataframe_from_shapefile.
+    A file is only written, to a temporary directory, when a reader asks for local_file_path.
+    The file is in a format the pyincore file readers can open, and the temporary directory
+    is removed when the dataset is garbage collected.
+
+    Args:
+        dataframe (obj): Pandas DataFrame or GeoPandas GeoDataFrame.
+        data_type (str): Incore data type, e.g. incore:xxxx or ergo:xxxx
+        name (str): File name without extension used when the file is written.
+        file_format (str): Format of the written file, 'gpkg' or 'shp' for a GeoDataFrame
+            and 'csv' for a DataFrame. Defaults to 'gpkg' and 'csv'.
+
+    """
+
+    def __init__(self, dataframe, data_type, name="dataset", file_format=None):
+        self.dataframe = dataframe
+        self.name = name
+        self._local_file_path = None
+
+        if isinstance(dataframe, gpd.GeoDataFrame):
+            self.file_format = file_format or "gpkg"
+            valid_formats = ("gpkg", "shp")
+        else:
+            self.file_format = file_format or "csv"
+            valid_formats = ("csv",)
+        if self.file_format not in valid_formats:
+            raise ValueError(f"Unsupported file format '{self.file_format}', use one of {valid_formats}.")
+
+        metadata = {
+            "dataType": data_type,
+            "format": DATASET_FORMATS[self.file_format],
+            "fileDescriptors": [],
+            "id": name,
+        }
+        super().__init__(metadata)
+
+    @property
+    def local_file_path(self):
+        """str: Path of the dataset file, written on first access."""
+        if self._local_file_path is None and self.dataframe is not None:
+            self._local_file_path = self.write_file()
+
+        return self._local_file_path
+
+    @local_file_path.setter
+    def local_file_path(self, value):
+        self._local_file_path = value
+
+    def write_file(self):
+        """Write the frame to a new temporary directory that is removed with the dataset.
+
+        Returns:
+            str: Path of the written file.
+
+        """
+        out_dir = tempfile.mkdtemp(prefix="pyincore_data_")
+        weakref.finalize(self, shutil.rmtree, out_dir, True)
+        out_file = os.path.join(out_dir, self.name + "." + self.file_format)
+        if self.file_format == "gpkg":
+            self.dataframe.to_file(out_file, driver="GPKG")
+        elif self.file_format == "shp":
+            self.dataframe.to_file(out_file)
+        else:
+            self.dataframe.to_csv(out_file, index=False)
+
+        return out_file
+
+    def get_dataframe_from_csv(self, low_memory=True, delimiter=None):
+        """Get the in-memory DataFrame.
+
+        Returns:
+            obj: Panda's DataFrame.
+
+        """
+        return self.dataframe.copy()
+
+    def get_dataframe_from_shapefile(self):
+        """Get the in-memory GeoDataFrame.
+
+        Returns:
+            obj: Geopanda's GeoDataFrame.
+
+        """
+        return self.dataframe.copy()
@@ -4,16 +4,45 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
-import fiona
-import requests
-import uuid
+import functools
 import os
+import time
+import zipfile
+import numpy as np
+import pandas as pd
 import geopandas as gpd
+import pyarrow as pa
+import pyogrio
+import shapely
 import sqlalchemy
 
-from sqlalchemy import create_engine
-from geojson import FeatureCollection
+from concurrent.futures import ThreadPoolExecutor
+from pyogrio.raw import open_arrow
+from requests import RequestException
+from shapely.geometry import shape
 from pyincore_data.config import Config
+from pyincore_data.utils.cacheutil import CacheUtil
+from pyincore_data.utils.httputil import HttpUtil
+from pyincore_data.utils.jsonutil import JsonUtil
+from pyincore_data.utils.postgresutil import PostgresUtil
+
+# nullable pandas dtypes of Arrow integer and boolean columns, so a batch with nulls keeps the type of the column
+# instead of turning into float or object
+_ARROW_NULLABLE_DTYPES = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.uint8(): pd.UInt8Dtype(),
+    pa.uint16(): pd.UInt16Dtype(),
+    pa.uint32(): pd.UInt32Dtype(),
+    pa.uint64(): pd.UInt64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# positions of the hex digits in a GUID string, the others hold dashes
+_GUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
 
 
 class DataUtil:
@@ -47,6 +76,23 @@ class DataUtil:
         )
         in_gpd.to_file(programname + "/" + savefile + ".gpkg", driver="GPKG")
 
+    @staticmethod
+    def convert_dislocation_gpd_to_geoparquet(in_gpd, programname, savefile, compression=None, row_group_size=None):
+        """Create GeoParquet of dislocation geodataframe.
+
+        Args:
+            in_gpd (object): Geodataframe of the dislocation.
+            programname (str): Output directory name.
+            savefile (str): Output GeoParquet file name.
+            compression (str): Parquet compression codec. Defaults to Config.GEOPARQUET_COMPRESSION.
+            row_group_size (int): Maximum number of rows per row group. Defaults to Config.GEOPARQUET_ROW_GROUP_SIZE.
+
+        """
+        print("GeoParquet data file saved to: " + programname + "/" + savefile + ".parquet")
+        DataUtil.gdf_to_geoparquet(
+            in_gpd, programname + "/" + savefile + ".parquet", compression, row_group_size
+        )
+
     @staticmethod
     def convert_dislocation_pd_to_csv(in_pd, save_columns, programname, savefile):
         """Create csv of dislocation dataframe using the column names.
@@ -64,78 +110,331 @@ class DataUtil:
         in_pd[save_columns].to_csv(programname + "/" + savefile + ".csv", index=False)
 
     @staticmethod
-    def get_features_by_fips(state_county_fips):
+    def get_nsi_cache():
+        """
+        Gets the local cache used for NSI structures of counties.
+
+        Returns:
+            CacheUtil: A CacheUtil configured by the NSI_CACHE_* settings in Config.
+        """
+        return CacheUtil("nsi", max_size=Config.NSI_CACHE_MAX_SIZE, ttl=Config.NSI_CACHE_TTL)
+
+    @staticmethod
+    def get_features_by_fips(state_county_fips, use_cache=None, refresh=False):
         """
         Downloads a GeoJSON feature collection from the NSI endpoint using the provided county FIPS code
         and returns it as a GeoDataFrame with additional columns for FIPS, state FIPS, and county FIPS.
 
+        The structures of each county are kept in a local GeoParquet cache together with the fetch time
+        and the ETag and Last-Modified validators of the response. Entries older than Config.NSI_CACHE_TTL
+        are revalidated with a conditional request and only downloaded again if they changed.
+
         Args:
             state_county_fips (str): The combined state and county FIPS code (e.g., '15005').
+            use_cache (bool): Read and write the local NSI cache. Defaults to Config.NSI_CACHE_ENABLED.
+            refresh (bool): Revalidate the cached structures with the NSI service even if they are not expired.
 
         Returns:
             gpd.GeoDataFrame: A GeoDataFrame containing the features with additional columns.
         """
-        print("Requesting data for " + str(state_county_fips) + " from NSI endpoint")
-        json_url = Config.NSI_URL_FIPS + str(state_county_fips)
-        result = requests.get(json_url)
-        result.raise_for_status()
-        result_json = result.json()
+        if use_cache is None:
+            use_cache = Config.NSI_CACHE_ENABLED
 
-        collection = FeatureCollection(result_json['features'])
-
-        gdf = gpd.GeoDataFrame.from_features(collection['features'])
-        gdf = gdf.set_crs(epsg=4326)
+        json_url = Config.NSI_URL_FIPS + str(state_county_fips)
+        cache = DataUtil.get_nsi_cache()
+        cache_key = CacheUtil.normalize_url(json_url)
+
+        cached_file = None
+        headers = {}
+        if use_cache:
+            if not refresh:
+                cached_file = cache.get(cache_key, "parquet")
+                if cached_file is not None:
+                    print("Reading data for " + str(state_county_fips) + " from NSI cache")
+                    return DataUtil.add_columns_to_gdf(gpd.read_parquet(cached_file), state_county_fips)
+
+            cached_file = cache.get(cache_key, "parquet", allow_expired=True)
+            meta = cache.get_meta(cache_key) if cached_file is not None else None
+            if meta is not None and meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta is not None and meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
 
+        print("Requesting data for " + str(state_county_fips) + " from NSI endpoint")
+        with HttpUtil.get(json_url, stream=True, headers=headers) as result:
+            if result.status_code == 304 and cached_file is not None:
+                # not modified, restart the time to live of the cached structures
+                print("Cached data for " + str(state_county_fips) + " is up to date")
+                cache.update_meta(cache_key, created=time.time())
+                gdf = gpd.read_parquet(cached_file)
+            else:
+                result.raise_for_status()
+                # decode the features one by one instead of loading the whole collection
+                features = JsonUtil.iter_array_items(result.iter_content(chunk_size=1024 * 1024), key='features')
+                gdf = DataUtil.features_to_gdf(features)
+
+                if use_cache:
+                    try:
+                        cache.put(
+                            cache_key,
+                            "parquet",
+                            lambda path: DataUtil.gdf_to_geoparquet(gdf, path),
+                            url=json_url,
+                            etag=result.headers.get("ETag"),
+                            last_modified=result.headers.get("Last-Modified"),
+                        )
+                    except (OSError, ValueError, pa.ArrowException) as e:
+                        print("Failed to cache NSI data: " + str(e))
+
+        # GUIDs are created for every request, the cache only keeps the NSI structures
         gdf = DataUtil.add_columns_to_gdf(gdf, state_county_fips)
 
         return gdf
 
     @staticmethod
-    def download_nsi_data_state_file(state_fips):
+    def clear_nsi_cache(state_county_fips=None):
+        """
+        Removes cached NSI structures.
+
+        Args:
+            state_county_fips (str): The combined state and county FIPS code. None removes all counties.
+
+        Returns:
+            None
+        """
+        cache = DataUtil.get_nsi_cache()
+        if state_county_fips is None:
+            cache.clear()
+        else:
+            cache.remove(CacheUtil.normalize_url(Config.NSI_URL_FIPS + str(state_county_fips)))
+
+    @staticmethod
+    def features_to_gdf(features, crs="EPSG:4326"):
+        """
+        Creates a GeoDataFrame from GeoJSON features, collecting properties and point coordinates into columns.
+
+        Point geometries are created in one vectorized call instead of one shapely object per feature,
+        other geometry types are converted individually.
+
+        Args:
+            features (iterable): GeoJSON feature dictionaries, e.g. from JsonUtil.iter_array_items.
+            crs (str): CRS of the coordinates.
+
+        Returns:
+            gpd.GeoDataFrame: A GeoDataFrame with the geometry column followed by the feature properties.
+        """
+        columns = {}
+        x = []
+        y = []
+        other_geometries = {}
+        count = 0
+        for feature in features:
+            properties = feature.get('properties') or {}
+            for key, value in properties.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [None] * count
+                column.append(value)
+            count += 1
+            # pad the columns missing in this feature
+            if len(properties) != len(columns):
+                for column in columns.values():
+                    if len(column) < count:
+                        column.append(None)
+
+            geometry = feature.get('geometry')
+            if geometry and geometry.get('type') == 'Point' and geometry.get('coordinates'):
+                x.append(geometry['coordinates'][0])
+                y.append(geometry['coordinates'][1])
+            else:
+                x.append(np.nan)
+                y.append(np.nan)
+                if geometry:
+                    other_geometries[count - 1] = shape(geometry)
+
+        x = np.asarray(x, dtype=float)
+        geometries = shapely.points(x, np.asarray(y, dtype=float))
+        geometries[np.isnan(x)] = None
+        for index, geometry in other_geometries.items():
+            geometries[index] = geometry
+
+        return gpd.GeoDataFrame({'geometry': geometries, **columns}, geometry='geometry', crs=crs)
+
+    @staticmethod
+    def download_nsi_data_state_file(state_fips, download_dir="data", progress=None, resume=True, verify=True):
         """
         Downloads a zipped GeoPackage file for the given state FIPS code from the NSI endpoint.
 
+        The file is downloaded in large chunks to a partial file that is resumed with an http Range
+        request after a dropped connection and only moved into place once it is complete and valid.
+
         Args:
             state_fips (str): The state FIPS code (e.g., '29' for Missouri).
+            download_dir (str): Directory to save the file to. Created if it does not exist.
+            progress (function): Called with the downloaded and the total number of bytes after every chunk.
+            resume (bool): Continue a partial download from an earlier attempt.
+            verify (bool): Check the length and the CRCs of the zip file before it is moved into place.
 
         Returns:
-            None
+            str: Path of the downloaded file.
         """
         file_name = Config.NSI_PREFIX + str(state_fips) + ".gpkg.zip"
-        file_url = "%s/%s" % (Config.NSI_URL_STATE, file_name)
+        file_url = "%s/%s" % (Config.NSI_URL_STATE.rstrip("/"), file_name)
         print("Downloading NSI data for the state: " + str(state_fips))
-        r = requests.get(file_url, stream=True)
 
-        if r is None or r.status_code != 200:
-            r.raise_for_status()
+        os.makedirs(download_dir, exist_ok=True)
+        download_filename = os.path.join(download_dir, file_name)
+        HttpUtil.download(
+            file_url,
+            download_filename,
+            resume=resume,
+            progress=progress,
+            verify=DataUtil.verify_zip_file if verify else None,
+        )
+        print("Downloaded NSI data for the state: " + str(state_fips) + " to " + download_filename)
 
-        else:
-            download_filename = os.path.join("data", file_name)
+        return download_filename
+
+    @staticmethod
+    def download_nsi_data_state_files(state_fips_list, download_dir="data", progress=None, max_workers=None):
+        """
+        Downloads zipped GeoPackage files of several states in parallel.
+
+        Args:
+            state_fips_list (list): A list of state FIPS codes (e.g., ['29', '15']).
+            download_dir (str): Directory to save the files to.
+            progress (function): Called with the state FIPS code, the downloaded and the total number of bytes.
+            max_workers (int): Maximum number of concurrent downloads. Defaults to Config.MAX_WORKERS.
 
-            with open(download_filename, "wb") as zipfile:
-                for chunk in r.iter_content(chunk_size=1024):
-                    if chunk:
-                        zipfile.write(chunk)
-                        print("Downloading NSI data for the state: " + str(state_fips))
+        Returns:
+            list: Paths of the downloaded files in the order of state_fips_list, None for states that failed.
+        """
+        def download(state_fips):
+            state_progress = None
+            if progress is not None:
+                state_progress = functools.partial(progress, state_fips)
+            try:
+                return DataUtil.download_nsi_data_state_file(state_fips, download_dir, state_progress)
+            except (RequestException, OSError, zipfile.BadZipFile) as e:
+                print("Failed to download NSI data for the state " + str(state_fips) + ": " + str(e))
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers or Config.MAX_WORKERS) as executor:
+            return list(executor.map(download, state_fips_list))
 
     @staticmethod
-    def read_geopkg_to_gdf(infile):
+    def verify_zip_file(path):
+        """
+        Checks that a zip file is complete and that the CRCs of its members match.
+
+        Args:
+            path (str): Path of the zip file.
+
+        Returns:
+            None
+        """
+        with zipfile.ZipFile(path) as zip_file:
+            bad_member = zip_file.testzip()
+        if bad_member is not None:
+            raise zipfile.BadZipFile("CRC check failed for " + bad_member + " in " + path)
+
+    @staticmethod
+    def read_geopkg_to_gdf(infile, layer=None, columns=None, where=None):
         """
         Reads a GeoPackage file and converts it into a GeoDataFrame.
 
         Args:
-            infile (str): Path to the GeoPackage file.
+            infile (str): Path to the GeoPackage file, or a zip file containing it.
+            layer (str): Name of the layer to read. Defaults to the last layer of the file.
+            columns (list): Names of the attribute columns to read. None reads all columns.
+            where (str): SQL WHERE clause evaluated by the reader, e.g. "cbfips LIKE '15001%'".
 
         Returns:
             gpd.GeoDataFrame: A GeoDataFrame containing data from the GeoPackage file.
         """
         print("Reading GeoPackage")
-        gpkgpd = None
-        for layername in fiona.listlayers(infile):
-            gpkgpd = gpd.read_file(infile, layer=layername, crs='EPSG:4326')
+        if layer is None:
+            layer = pyogrio.list_layers(infile)[-1][0]
+
+        gpkgpd = gpd.read_file(infile, engine="pyogrio", layer=layer, columns=columns, where=where)
+        if gpkgpd.crs is None:
+            gpkgpd = gpkgpd.set_crs(epsg=4326)
 
         return gpkgpd
 
+    @staticmethod
+    def iter_geopkg_batches(infile, batch_size=65536, columns=None, where=None, layer=None, as_arrow=False):
+        """
+        Reads a GeoPackage in fixed size record batches through Arrow.
+
+        Only one batch is held in memory at a time, so state files larger than the available memory
+        can be processed, and the columnar Arrow path avoids decoding feature by feature. Integer and
+        boolean columns are nullable pandas dtypes, so every batch has the dtypes of the file schema.
+
+        Args:
+            infile (str): Path to the GeoPackage file, or a zip file containing it.
+            batch_size (int): Maximum number of rows per batch.
+            columns (list): Names of the attribute columns to read. None reads all columns.
+            where (str): SQL WHERE clause evaluated by the reader, e.g. "cbfips LIKE '15001%'".
+            layer (str): Name of the layer to read. Defaults to the last layer of the file.
+            as_arrow (bool): Yield pyarrow RecordBatches with WKB geometries instead of GeoDataFrames.
+
+        Returns:
+            generator: GeoDataFrames, or pyarrow RecordBatches if as_arrow is True.
+        """
+        if layer is None:
+            layer = pyogrio.list_layers(infile)[-1][0]
+
+        with open_arrow(
+            infile, layer=layer, columns=columns, where=where, batch_size=batch_size, use_pyarrow=True
+        ) as (meta, reader):
+            geometry_name = meta["geometry_name"] or "wkb_geometry"
+            crs = meta["crs"] or "EPSG:4326"
+            for batch in reader:
+                if as_arrow:
+                    yield batch
+                    continue
+
+                df = batch.to_pandas(types_mapper=_ARROW_NULLABLE_DTYPES.get)
+                geometry = gpd.GeoSeries.from_wkb(df.pop(geometry_name), crs=crs)
+                yield gpd.GeoDataFrame(df, geometry=geometry, crs=crs)
+
+    @staticmethod
+    def read_nsi_counties_from_state_file(infile, fips_list, columns=None, layer=None):
+        """
+        Reads the NSI structures of counties from a downloaded state GeoPackage without any network request.
+
+        The county filter on the census block FIPS code and the column selection are pushed down
+        to the reader, so only the structures and columns of the requested counties are decoded.
+
+        Args:
+            infile (str): Path to the state GeoPackage, or the zip file from download_nsi_data_state_file.
+            fips_list (list): A list of county FIPS codes (e.g., ['15001', '15003']).
+            columns (list): Names of the attribute columns to read. None reads all columns.
+            layer (str): Name of the layer to read. Defaults to the last layer of the file.
+
+        Returns:
+            gpd.GeoDataFrame: A GeoDataFrame with the structures of the counties and the guid and FIPS columns.
+        """
+        for fips in fips_list:
+            if len(str(fips)) != 5 or not str(fips).isdigit():
+                raise ValueError(f"Invalid county FIPS code '{fips}'.")
+
+        # census block FIPS codes start with the county FIPS code
+        where = " OR ".join(f"cbfips LIKE '{fips}%'" for fips in fips_list)
+        if columns is not None and "cbfips" not in columns:
+            columns = list(columns) + ["cbfips"]
+
+        gdf = DataUtil.read_geopkg_to_gdf(infile, layer=layer, columns=columns, where=where)
+
+        gdf['guid'] = DataUtil.generate_guids(len(gdf))
+        fips = gdf['cbfips'].str[:5]
+        gdf['fips'] = fips
+        gdf['statefips'] = fips.str[:2]
+        gdf['countyfips'] = fips.str[2:]
+
+        return gdf
+
     @staticmethod
     def add_guid_to_gdf(gdf):
         """
@@ -148,10 +447,35 @@ class DataUtil:
             gpd.GeoDataFrame: GeoDataFrame with a new 'guid' column.
         """
         print("Creating GUID column")
-        gdf['guid'] = [str(uuid.uuid4()) for _ in range(len(gdf))]
+        gdf['guid'] = DataUtil.generate_guids(len(gdf))
 
         return gdf
 
+    @staticmethod
+    def generate_guids(count):
+        """
+        Generates random version 4 UUID strings from a single bulk random buffer.
+
+        Args:
+            count (int): Number of GUIDs to generate.
+
+        Returns:
+            np.ndarray: An array of GUID strings in the canonical 8-4-4-4-12 format.
+        """
+        raw = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+        # set the version 4 and RFC 4122 variant bits like uuid.uuid4
+        raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+
+        nibbles = np.empty((count, 32), dtype=np.uint8)
+        nibbles[:, 0::2] = raw >> 4
+        nibbles[:, 1::2] = raw & 0x0F
+
+        chars = np.full((count, 36), ord("-"), dtype=np.uint8)
+        chars[:, _GUID_HEX_POSITIONS] = _HEX_DIGITS[nibbles]
+
+        return chars.view("S36").ravel().astype(str)
+
     @staticmethod
     def add_columns_to_gdf(gdf, fips):
         """
@@ -167,12 +491,11 @@ class DataUtil:
         print("Creating FIPS-related columns")
         statefips = fips[:2]
         countyfips = fips[2:]
-        for i, row in gdf.iterrows():
-            guid_val = str(uuid.uuid4())
-            gdf.at[i, 'guid'] = guid_val
-            gdf.at[i, 'fips'] = fips
-            gdf.at[i, 'statefips'] = statefips
-            gdf.at[i, 'countyfips'] = countyfips
+        gdf['guid'] = DataUtil.generate_guids(len(gdf))
+        # plain string columns, categoricals can not be written by the fiona engine
+        gdf['fips'] = fips
+        gdf['statefips'] = statefips
+        gdf['countyfips'] = countyfips
 
         return gdf
 
@@ -192,50 +515,97 @@ class DataUtil:
         gdf.to_file(outfile, driver="GPKG")
 
     @staticmethod
-    def upload_postgres_from_gpkg(infile):
+    def gdf_to_geoparquet(gdf, outfile, compression=None, row_group_size=None):
         """
-        Reads data from a GeoPackage file and uploads it to a PostgreSQL database.
+        Saves a GeoDataFrame as a GeoParquet file.
 
         Args:
-            infile (str): Path to the GeoPackage file.
+            gdf (gpd.GeoDataFrame): Input GeoDataFrame.
+            outfile (str): Path to the output GeoParquet file.
+            compression (str): Parquet compression codec, e.g. 'zstd' or 'snappy'.
+                Defaults to Config.GEOPARQUET_COMPRESSION.
+            row_group_size (int): Maximum number of rows per row group. Defaults to Config.GEOPARQUET_ROW_GROUP_SIZE.
 
         Returns:
             None
         """
-        gpkgpd = None
-        for layername in fiona.listlayers(infile):
-            gpkgpd = gpd.read_file(infile, layer=layername, crs='EPSG:4326')
+        gdf.to_parquet(
+            outfile,
+            index=False,
+            compression=compression or Config.GEOPARQUET_COMPRESSION,
+            row_group_size=row_group_size or Config.GEOPARQUET_ROW_GROUP_SIZE,
+        )
 
-        DataUtil.upload_postgres_gdf(gpkgpd)
+    @staticmethod
+    def read_geoparquet_to_gdf(infile, columns=None):
+        """
+        Reads a GeoParquet file and converts it into a GeoDataFrame.
+
+        Args:
+            infile (str): Path to the GeoParquet file.
+            columns (list): Names of the columns to read. None reads all columns.
+
+        Returns:
+            gpd.GeoDataFrame: A GeoDataFrame containing data from the GeoParquet file.
+        """
+        return gpd.read_parquet(infile, columns=columns)
 
     @staticmethod
-    def upload_postgres_gdf(gdf):
+    def upload_postgres_from_gpkg(infile, batch_size=65536):
         """
-        Uploads a GeoDataFrame to a PostgreSQL database.
+        Reads data from a GeoPackage file and uploads it to a PostgreSQL database.
+
+        The file is read in batches that are streamed to the database with COPY, so it does not
+        need to fit into memory, and the nsi_raw table is replaced once all batches are loaded.
 
         Args:
-            gdf (gpd.GeoDataFrame): Input GeoDataFrame.
+            infile (str): Path to the GeoPackage file.
+            batch_size (int): Maximum number of rows read at a time.
 
         Returns:
             bool: True if upload is successful, False otherwise.
         """
-        try:
-            db_connection_url = "postgresql://%s:%s@%s:%s/%s" % \
-                                (Config.DB_USERNAME, Config.DB_PASSWORD, Config.DB_URL, Config.DB_PORT, Config.DB_NAME)
-            con = create_engine(db_connection_url)
+        return DataUtil.upload_postgres_gdf(DataUtil.iter_geopkg_batches(infile, batch_size=batch_size))
 
-            print('Dropping ' + str(gdf.geometry.isna().sum()) + ' nulls.')
-            gdf = gdf.dropna(subset=['geometry'])
+    @staticmethod
+    def upload_postgres_gdf(gdf, if_exists='replace', table=None, partition_by_county=False):
+        """
+        Uploads a GeoDataFrame to a PostgreSQL database.
 
-            print('Uploading GeoDataFrame to database')
-            gdf.to_postgis("nsi_raw", con, index=False, if_exists='replace')
+        Rows are bulk loaded with COPY through a pooled engine. A replaced table is loaded into a
+        staging table first and swapped in atomically with a GiST index on the geometry and
+        B-tree indexes on the FIPS columns. In 'upsert' mode the table is partitioned by state FIPS
+        and only the counties in the GeoDataFrame are replaced, concurrently over pooled connections.
 
-            con.dispose()
+        Args:
+            gdf (gpd.GeoDataFrame): Input GeoDataFrame, or an iterable of GeoDataFrames.
+                For 'upsert' a GeoDataFrame with fips and statefips columns or a dict of them keyed by FIPS.
+            if_exists (str): 'replace' the existing table, 'append' to it or 'upsert' the counties.
+            table (str): Name of the table. Defaults to nsi_raw, or Config.NSI_DB_TABLE in 'upsert' mode.
+            partition_by_county (bool): Sub-partition new state partitions by county FIPS in 'upsert' mode.
 
-            print('Upload to database completed.')
+        Returns:
+            bool: True if upload is successful, False otherwise. In 'upsert' mode False means that at least
+                one county failed, the other counties are committed.
+        """
+        try:
+            print('Uploading GeoDataFrame to database')
+            if if_exists == 'append':
+                row_count = PostgresUtil.append(gdf, table or 'nsi_raw')
+            elif if_exists == 'upsert':
+                row_counts, failures = PostgresUtil.upsert_counties(gdf, table, partition_by_county)
+                for fips, error in failures.items():
+                    print(f"Failed to upload NSI data for FIPS {fips}: {error}")
+                if failures:
+                    return False
+                row_count = sum(row_counts.values())
+            else:
+                row_count = PostgresUtil.bulk_load(gdf, table or 'nsi_raw')
+
+            print('Upload to database completed. ' + str(row_count) + ' rows uploaded.')
 
             return True
 
         except sqlalchemy.exc.OperationalError:
             print("Error in connecting to the database server")
-            return False
\ No newline at end of file
+            return False
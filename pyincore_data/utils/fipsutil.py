@@ -0,0 +1,420 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import difflib
+import re
+import threading
+
+import pandas as pd
+
+from pyincore_data.config import Config
+from pyincore_data.utils.cacheutil import CacheUtil
+from pyincore_data.utils.httputil import HttpUtil
+from pyincore_data import globals as pyincore_globals
+
+logger = pyincore_globals.LOGGER
+
+# county name suffixes that can be left out when looking up a county
+COUNTY_SUFFIXES = [
+    "city and borough", "census area", "planning region", "municipality", "municipio", "borough", "parish",
+    "district", "island", "county"
+]
+
+_gazetteers = {}
+_gazetteers_lock = threading.Lock()
+
+
+class FipsUtil:
+    """Local county gazetteer for FIPS code lookups.
+
+    The national county list of a census dataset is downloaded once, kept in the local cache and
+    indexed in memory by normalized state and county name and by FIPS code, so lookups need no network.
+    """
+
+    @staticmethod
+    def normalize_name(name):
+        """Normalize a state or county name for lookups.
+
+        Args:
+            name (str): State or county name. e.g, 'St. Louis County'
+
+        Returns:
+            str: Lower case name with punctuation and repeated whitespace removed. e.g, 'st louis county'
+
+        """
+        name = re.sub(r"[^\w\s]", "", str(name).lower().replace("-", " "))
+
+        return " ".join(name.split())
+
+    @staticmethod
+    def strip_county_suffix(name):
+        """Remove the county type suffix from a normalized county name.
+
+        Args:
+            name (str): Normalized county name. e.g, 'champaign county'
+
+        Returns:
+            str: County name without suffix. e.g, 'champaign'
+
+        """
+        for suffix in COUNTY_SUFFIXES:
+            if name.endswith(" " + suffix):
+                return name[: -len(suffix) - 1]
+
+        return name
+
+    @staticmethod
+    def get_state_fips_codes():
+        """Get FIPS codes of the states, the District of Columbia and the territories.
+
+        Returns:
+            dict: A dictionary of state name and state FIPS code.
+
+        """
+        state_fips_codes = dict(pyincore_globals.STATE_FIPS_CODES)
+        state_fips_codes.update(pyincore_globals.TERRITORY_FIPS_CODES)
+
+        return state_fips_codes
+
+    @staticmethod
+    def get_state_fips(state):
+        """Get FIPS code of a state by name.
+
+        Args:
+            state (str): State name. e.g, 'illinois'
+
+        Returns:
+            str: State FIPS code or None if the state is not found.
+
+        """
+        state_key = FipsUtil.normalize_name(state)
+        for state_name, state_fips in FipsUtil.get_state_fips_codes().items():
+            if FipsUtil.normalize_name(state_name) == state_key:
+                return state_fips
+
+        return None
+
+    @staticmethod
+    def download_county_table(base_url):
+        """Download the national county list of a census dataset.
+
+        Args:
+            base_url (str): Census dataset url. e.g, 'https://api.census.gov/data/2020/acs/acs5'
+
+        Returns:
+            obj: A dataframe with fips, state, county, state_name and county_name columns.
+
+        """
+        api_url = f"{base_url}?get=NAME&for=county:*"
+        response = HttpUtil.get(api_url)
+        if response.status_code != 200:
+            error_msg = "Failed to download the county list from Census API: " + api_url
+            logger.error(error_msg)
+            raise Exception(error_msg)
+
+        api_json = response.json()
+        api_df = pd.DataFrame(columns=api_json[0], data=api_json[1:])
+
+        county_table = pd.DataFrame(
+            {
+                "fips": api_df["state"] + api_df["county"],
+                "state": api_df["state"],
+                "county": api_df["county"],
+                "county_name": api_df["NAME"].str.rsplit(",", n=1).str[0].str.strip(),
+                "state_name": api_df["NAME"].str.rsplit(",", n=1).str[1].str.strip(),
+            }
+        )
+
+        # add island areas, which are missing from the county api
+        county_fips = set(county_table["fips"])
+        state_names = {fips: name for name, fips in pyincore_globals.TERRITORY_FIPS_CODES.items()}
+        island_areas = pd.DataFrame(
+            [
+                {
+                    "fips": fips,
+                    "state": fips[:2],
+                    "county": fips[2:],
+                    "county_name": county_name,
+                    "state_name": state_names[fips[:2]],
+                }
+                for fips, county_name in pyincore_globals.ISLAND_AREA_COUNTY_NAMES.items()
+                if fips not in county_fips
+            ],
+            columns=county_table.columns,
+        )
+
+        return pd.concat([county_table, island_areas], ignore_index=True)
+
+    @staticmethod
+    def get_county_table(base_url: str = None):
+        """Get the national county list of a census dataset from the local cache.
+
+        The list is downloaded from the census api the first time it is used.
+
+        Args:
+            base_url (str): Census dataset url. Defaults to globals.COUNTY_FIPS_BASE_URL.
+
+        Returns:
+            obj: A dataframe with fips, state, county, state_name and county_name columns.
+
+        """
+        return FipsUtil.get_gazetteer(base_url)["table"]
+
+    @staticmethod
+    def get_gazetteer(base_url: str = None):
+        """Get the county gazetteer of a census dataset.
+
+        Args:
+            base_url (str): Census dataset url. Defaults to globals.COUNTY_FIPS_BASE_URL.
+
+        Returns:
+            dict: The county table, and indexes by (state, county) name and by FIPS code.
+
+        """
+        if base_url is None:
+            base_url = pyincore_globals.COUNTY_FIPS_BASE_URL
+
+        gazetteer = _gazetteers.get(base_url)
+        if gazetteer is not None:
+            return gazetteer
+
+        with _gazetteers_lock:
+            if base_url not in _gazetteers:
+                _gazetteers[base_url] = FipsUtil.build_gazetteer(
+                    FipsUtil.load_county_table(base_url)
+                )
+
+        return _gazetteers[base_url]
+
+    @staticmethod
+    def load_county_table(base_url):
+        """Load the county table of a census dataset from the local cache, downloading it on a miss.
+
+        Args:
+            base_url (str): Census dataset url.
+
+        Returns:
+            obj: A dataframe with fips, state, county, state_name and county_name columns.
+
+        """
+        cache = CacheUtil("gazetteer")
+        cache_key = CacheUtil.normalize_url(base_url)
+        cached_file = cache.get(cache_key, "parquet")
+        if cached_file is not None:
+            return pd.read_parquet(cached_file)
+
+        if Config.CENSUS_CACHE_OFFLINE:
+            error_msg = "County list is not available in the local cache: " + base_url
+            logger.error(error_msg)
+            raise Exception(error_msg)
+
+        county_table = FipsUtil.download_county_table(base_url)
+        try:
+            cache.put(
+                cache_key, "parquet", lambda path: county_table.to_parquet(path, index=False)
+            )
+        except OSError as e:
+            logger.warning("Failed to cache county list: " + str(e))
+
+        return county_table
+
+    @staticmethod
+    def build_gazetteer(county_table):
+        """Index a county table by normalized name and by FIPS code.
+
+        Every county can be found by its full name, e.g. 'champaign county', and by its name without
+        the county type suffix, e.g. 'champaign'. If two counties of a state share the short name,
+        e.g. Baltimore County and Baltimore city, the short name refers to the county.
+
+        Args:
+            county_table (obj): A dataframe with fips, state, county, state_name and county_name columns.
+
+        Returns:
+            dict: The county table, and indexes by (state, county) name and by FIPS code.
+
+        """
+        county_table = county_table.reset_index(drop=True)
+        state_keys = county_table["state_name"].map(FipsUtil.normalize_name)
+        county_keys = county_table["county_name"].map(FipsUtil.normalize_name)
+
+        by_name = {}
+        for state_key, county_key, fips in zip(state_keys, county_keys, county_table["fips"]):
+            by_name[(state_key, county_key)] = fips
+
+        # short names, counties first
+        for state_key, county_key, fips in sorted(
+            zip(state_keys, county_keys, county_table["fips"]),
+            key=lambda entry: not entry[1].endswith(" county"),
+        ):
+            by_name.setdefault((state_key, FipsUtil.strip_county_suffix(county_key)), fips)
+
+        by_fips = {fips: index for index, fips in enumerate(county_table["fips"])}
+
+        # the same name index keyed by 'state|county' strings for vectorized lookups
+        name_index = pd.Series(
+            {state_key + "|" + county_key: fips for (state_key, county_key), fips in by_name.items()}
+        )
+
+        return {"table": county_table, "by_name": by_name, "by_fips": by_fips, "name_index": name_index}
+
+    @staticmethod
+    def get_county_fips(state, county, base_url: str = None):
+        """Get FIPS code of a county by state and county name.
+
+        Args:
+            state (str): State name. e.g, 'illinois'
+            county (str): County name with or without suffix. e.g, 'champaign' or 'Champaign County'
+            base_url (str): Census dataset url. Defaults to globals.COUNTY_FIPS_BASE_URL.
+
+        Returns:
+            str: County FIPS code or None if the county is not found.
+
+        """
+        by_name = FipsUtil.get_gazetteer(base_url)["by_name"]
+        state_key = FipsUtil.normalize_name(state)
+        county_key = FipsUtil.normalize_name(county)
+
+        fips = by_name.get((state_key, county_key))
+        if fips is None:
+            fips = by_name.get((state_key, FipsUtil.strip_county_suffix(county_key)))
+
+        return fips
+
+    @staticmethod
+    def get_county_by_fips(fips, base_url: str = None):
+        """Get state and county names of a county FIPS code.
+
+        Args:
+            fips (str): County FIPS code. e.g, '17019'
+            base_url (str): Census dataset url. Defaults to globals.COUNTY_FIPS_BASE_URL.
+
+        Returns:
+            dict: The county entry with fips, state, county, state_name and county_name, or None.
+
+        """
+        gazetteer = FipsUtil.get_gazetteer(base_url)
+        index = gazetteer["by_fips"].get(str(fips).zfill(5))
+        if index is None:
+            return None
+
+        return gazetteer["table"].iloc[index].to_dict()
+
+    @staticmethod
+    def get_counties_by_state(state, base_url: str = None):
+        """Get all counties of a state.
+
+        Args:
+            state (str): State name. e.g, 'illinois'
+            base_url (str): Census dataset url. Defaults to globals.COUNTY_FIPS_BASE_URL.
+
+        Returns:
+            obj: A dataframe with fips, state, county, state_name and county_name columns,
+                or None if the state is not found.
+
+        """
+        state_fips = FipsUtil.get_state_fips(state)
+        if state_fips is None:
+            return None
+
+        county_table = FipsUtil.get_county_table(base_url)
+
+        return county_table[county_table["state"] == state_fips].reset_index(drop=True)
+
+    @staticmethod
+    def normalize_names(names):
+        """Normalize a column of state or county names for lookups, see normalize_name.
+
+        Args:
+            names (obj): A pandas Series of names.
+
+        Returns:
+            obj: A pandas Series of normalized names.
+
+        """
+        return (
+            names.astype(str)
+            .str.lower()
+            .str.replace("-", " ", regex=False)
+            .str.replace(r"[^\w\s]", "", regex=True)
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip()
+        )
+
+    @staticmethod
+    def resolve_county_fips(
+        counties,
+        state_column: str = "state",
+        county_column: str = "county",
+        base_url: str = None,
+        num_candidates: int = 3,
+    ):
+        """Resolve FIPS codes of many (state, county) name pairs with one join against the county table.
+
+        Names are matched after normalization, with or without the county type suffix. For pairs
+        without a match, the closest county names of the same state are suggested.
+
+        Args:
+            counties (obj): A pandas DataFrame with state and county name columns,
+                or a list of (state, county) name pairs.
+            state_column (str): Name of the state name column.
+            county_column (str): Name of the county name column.
+            base_url (str): Census dataset url. Defaults to globals.COUNTY_FIPS_BASE_URL.
+            num_candidates (int): Maximum number of suggested counties for each unmatched pair.
+
+        Returns:
+            obj: A copy of the input DataFrame with a 'fips' column, None if unmatched, a 'matched' column
+                and a 'candidates' column listing suggestions as 'County Name, State Name (FIPS)'.
+
+        """
+        if isinstance(counties, pd.DataFrame):
+            out_df = counties.copy()
+        else:
+            out_df = pd.DataFrame(list(counties), columns=[state_column, county_column])
+
+        gazetteer = FipsUtil.get_gazetteer(base_url)
+        name_index = gazetteer["name_index"]
+
+        state_keys = FipsUtil.normalize_names(out_df[state_column])
+        county_keys = FipsUtil.normalize_names(out_df[county_column])
+        short_county_keys = county_keys.str.replace(
+            r" (" + "|".join(COUNTY_SUFFIXES) + r")$", "", regex=True
+        )
+
+        fips = (state_keys + "|" + county_keys).map(name_index)
+        fips = fips.fillna((state_keys + "|" + short_county_keys).map(name_index))
+        out_df["fips"] = fips.astype(object).where(fips.notna(), None)
+        out_df["matched"] = fips.notna().to_numpy()
+
+        # suggest candidates for each distinct unmatched pair
+        county_table = gazetteer["table"]
+        table_state_keys = FipsUtil.normalize_names(county_table["state_name"])
+        table_county_keys = FipsUtil.normalize_names(county_table["county_name"])
+        candidates = {}
+        unmatched = ~out_df["matched"]
+        for state_key, county_key in set(zip(state_keys[unmatched], county_keys[unmatched])):
+            in_state = (table_state_keys == state_key).to_numpy()
+            state_counties = dict(zip(table_county_keys[in_state], county_table.index[in_state]))
+            query = county_key
+            if not state_counties:
+                # unknown state, compare against every county
+                state_counties = dict(zip(table_state_keys + " " + table_county_keys, county_table.index))
+                query = state_key + " " + county_key
+            matches = difflib.get_close_matches(query, list(state_counties), n=num_candidates, cutoff=0.6)
+            candidates[(state_key, county_key)] = [
+                "{county_name}, {state_name} ({fips})".format(**county_table.loc[state_counties[match]])
+                for match in matches
+            ]
+
+        out_df["candidates"] = [
+            candidates.get((state_key, county_key), []) if not is_matched else []
+            for state_key, county_key, is_matched in zip(state_keys, county_keys, out_df["matched"])
+        ]
+
+        num_unmatched = int(unmatched.sum())
+        if num_unmatched > 0:
+            logger.warning(str(num_unmatched) + " of " + str(len(out_df)) + " counties could not be resolved.")
+
+        return out_df
@@ -0,0 +1,68 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+from functools import lru_cache
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from pyproj import CRS, Transformer
+
+
+@lru_cache(maxsize=32)
+def _get_transformer(from_crs, to_crs):
+    return Transformer.from_crs(CRS.from_user_input(from_crs), CRS.from_user_input(to_crs), always_xy=True)
+
+
+class GeoUtil:
+    """Utility methods for geometry reprojection"""
+
+    @staticmethod
+    def get_transformer(from_crs, to_crs):
+        """Get a pyproj Transformer between two coordinate reference systems.
+
+        Transformers are cached per process, so repeated reprojections of counties in the same
+        projection do not rebuild the transformation pipeline.
+
+        Args:
+            from_crs (obj): Source CRS as anything accepted by pyproj, e.g. 'EPSG:4269' or a pyproj CRS.
+            to_crs (obj): Target CRS.
+
+        Returns:
+            obj: A pyproj Transformer with x, y axis order.
+
+        """
+        return _get_transformer(CRS.from_user_input(from_crs).to_wkt(), CRS.from_user_input(to_crs).to_wkt())
+
+    @staticmethod
+    def to_crs(gdf, crs=4326):
+        """Reproject a GeoDataFrame with a cached transformer.
+
+        Args:
+            gdf (obj): GeoPandas GeoDataFrame with a CRS set.
+            crs (obj): Target CRS. Defaults to EPSG 4326.
+
+        Returns:
+            obj: Reprojected GeoPandas GeoDataFrame.
+
+        """
+        target_crs = CRS.from_user_input(crs)
+        if gdf.crs is None:
+            raise ValueError("Cannot reproject a GeoDataFrame without a CRS.")
+        if gdf.crs == target_crs:
+            return gdf
+
+        transformer = GeoUtil.get_transformer(gdf.crs, target_crs)
+        # shapely 2.0 only passes interleaved (N, 2) coordinate arrays to the transformation
+        geometry = shapely.transform(
+            gdf.geometry.values.to_numpy(),
+            lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1])),
+        )
+
+        result = gdf.copy()
+        result[gdf.geometry.name] = gpd.GeoSeries(geometry, index=gdf.index, crs=target_crs)
+
+        return result
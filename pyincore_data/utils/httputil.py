@@ -0,0 +1,208 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pyincore_data.config import Config
+from pyincore_data import globals as pyincore_globals
+
+logger = pyincore_globals.LOGGER
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class HttpUtil:
+    """Shared http transport for Census, TIGER and NSI requests.
+
+    All requests go through a single requests Session, so connections are kept alive and pooled
+    per host, and failed requests with 429 or 5xx responses are retried with exponential backoff.
+    """
+
+    @staticmethod
+    def get_session():
+        """Get the shared http session, creating it on first use.
+
+        Returns:
+            obj: A requests Session with pooled and retrying adapters.
+
+        """
+        global _session
+        if _session is None:
+            with _session_lock:
+                if _session is None:
+                    _session = HttpUtil.create_session()
+
+        return _session
+
+    @staticmethod
+    def create_session():
+        """Create a requests Session configured by the HTTP_* settings in Config.
+
+        Returns:
+            obj: A requests Session.
+
+        """
+        retry = Retry(
+            total=Config.HTTP_MAX_RETRIES,
+            backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=Config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+        return session
+
+    @staticmethod
+    def close_session():
+        """Close the shared http session and release its pooled connections."""
+        global _session
+        with _session_lock:
+            if _session is not None:
+                _session.close()
+                _session = None
+
+    @staticmethod
+    def get_timeout(url):
+        """Get the (connect, read) timeout in seconds for the host of the url.
+
+        Args:
+            url (str): Request url.
+
+        Returns:
+            tuple: Connect and read timeout.
+
+        """
+        host = urlsplit(url).hostname or ""
+        read_timeout = Config.HTTP_HOST_TIMEOUTS.get(host, Config.HTTP_READ_TIMEOUT)
+
+        return Config.HTTP_CONNECT_TIMEOUT, read_timeout
+
+    @staticmethod
+    def get(url, **kwargs):
+        """Send a GET request through the shared session.
+
+        Args:
+            url (str): Request url.
+            **kwargs: Keyword arguments passed to requests, e.g. stream or headers.
+
+        Returns:
+            obj: A requests Response.
+
+        """
+        kwargs.setdefault("timeout", HttpUtil.get_timeout(url))
+
+        return HttpUtil.get_session().get(url, **kwargs)
+
+    @staticmethod
+    def download(url, out_file, chunk_size=None, resume=True, progress=None, verify=None):
+        """Download the content of a url to a file.
+
+        The content is written to out_file + '.part' and moved into place once it is complete,
+        so out_file never holds a partial download. If a partial file is left from an earlier
+        attempt, the download continues from its end with an http Range request.
+
+        Args:
+            url (str): Request url.
+            out_file (str): Path of the output file.
+            chunk_size (int): Size of the chunks written to the file in bytes.
+                Defaults to Config.HTTP_DOWNLOAD_CHUNK_SIZE.
+            resume (bool): Continue a partial download instead of starting over.
+            progress (function): Called with the downloaded and the total number of bytes after every chunk.
+                The total is None if the server does not report it.
+            verify (function): Called with the path of the complete partial file before it is moved into place.
+                It should raise an exception if the file is invalid.
+
+        Returns:
+            str: Path of the output file.
+
+        """
+        chunk_size = chunk_size or Config.HTTP_DOWNLOAD_CHUNK_SIZE
+        tmp_file = out_file + ".part"
+        offset = os.path.getsize(tmp_file) if resume and os.path.exists(tmp_file) else 0
+
+        # ask for the raw bytes, so the offsets and lengths match the file on the server
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        with HttpUtil.get(url, stream=True, headers=headers) as r:
+            if r.status_code == 416 and offset:
+                # the partial file is already complete or longer than the content
+                _, total = HttpUtil.parse_content_range(r.headers.get("Content-Range"))
+                if total != offset:
+                    os.remove(tmp_file)
+                    return HttpUtil.download(url, out_file, chunk_size, resume, progress, verify)
+            else:
+                r.raise_for_status()
+                start, total = HttpUtil.parse_content_range(r.headers.get("Content-Range"))
+                if r.status_code == 206:
+                    if start != offset:
+                        raise IOError(f"Unexpected content range of {url}: {r.headers.get('Content-Range')}")
+                    logger.debug("Resuming download of " + url + " at byte " + str(offset))
+                else:
+                    # the server sent the whole content
+                    offset = 0
+                    content_length = r.headers.get("Content-Length")
+                    total = int(content_length) if content_length is not None else None
+
+                downloaded = offset
+                with open(tmp_file, "ab" if offset else "wb", buffering=chunk_size) as f:
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        if progress is not None:
+                            progress(downloaded, total)
+
+        size = os.path.getsize(tmp_file)
+        if total is not None and size != total:
+            raise IOError(f"Incomplete download of {url}: received {size} of {total} bytes.")
+        if verify is not None:
+            try:
+                verify(tmp_file)
+            except Exception:
+                # a corrupt file can not be resumed
+                os.remove(tmp_file)
+                raise
+        os.replace(tmp_file, out_file)
+
+        return out_file
+
+    @staticmethod
+    def parse_content_range(content_range):
+        """Parse the first byte and the total length of a Content-Range header.
+
+        Args:
+            content_range (str): Header value, e.g. 'bytes 100-199/1000' or 'bytes */1000'.
+
+        Returns:
+            tuple: First byte and total length, None where unknown.
+
+        """
+        if content_range is None:
+            return None, None
+
+        byte_range, total = content_range.split(" ", 1)[-1].split("/", 1)
+        start = None if byte_range == "*" else int(byte_range.split("-", 1)[0])
+
+        return start, None if total == "*" else int(total)
@@ -0,0 +1,117 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import codecs
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+class _JsonStreamReader:
+    """Incremental reader of json values from an iterable of text or byte chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.done = False
+
+    def fill(self):
+        if self.done:
+            return False
+
+        # drop the consumed part of the buffer
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.buffer += self.text_decoder.decode(b"", final=True)
+            self.done = True
+        elif isinstance(chunk, bytes):
+            self.buffer += self.text_decoder.decode(chunk)
+        else:
+            self.buffer += chunk
+
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid json stream: expected '{char}' but found '{found}'.")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+                # a value that ends with the buffer may continue in the next chunk, e.g. a number
+                if end < len(self.buffer) or self.done:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.done:
+                    raise
+            self.fill()
+
+
+class JsonUtil:
+    """Utility methods for incremental json decoding"""
+
+    @staticmethod
+    def iter_array_items(chunks, key: str = None):
+        """Decode the items of a json array one by one from a stream of chunks.
+
+        Only the item being decoded and the current chunk are held in memory, so large responses
+        can be processed without loading the whole document.
+
+        Args:
+            chunks (iterable): Text or utf-8 byte chunks, e.g. response.iter_content().
+            key (str): Name of the top level object member holding the array, e.g. 'features'.
+                If None, the document itself must be the array.
+
+        Returns:
+            generator: Decoded array items.
+
+        """
+        reader = _JsonStreamReader(chunks)
+
+        if key is not None:
+            reader.expect("{")
+            while True:
+                name = reader.value()
+                reader.expect(":")
+                if name == key:
+                    break
+                # skip other members, e.g. 'type' of a FeatureCollection
+                reader.value()
+                if reader.peek() != ",":
+                    raise ValueError(f"Invalid json stream: '{key}' not found.")
+                reader.pos += 1
+
+        reader.expect("[")
+        if reader.peek() == "]":
+            return
+
+        while True:
+            yield reader.value()
+            separator = reader.peek()
+            if separator == "]":
+                return
+            reader.expect(",")
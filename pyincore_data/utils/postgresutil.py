@@ -0,0 +1,724 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+from sqlalchemy import create_engine
+
+from pyincore_data.config import Config
+from pyincore_data import globals as pyincore_globals
+
+logger = pyincore_globals.LOGGER
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+class PostgresUtil:
+    """Bulk loading of GeoDataFrames into PostgreSQL/PostGIS.
+
+    Rows are streamed with COPY in chunks, geometries are sent as hex encoded EWKB. A table is
+    replaced by loading a staging table, indexing it and renaming it in the same transaction,
+    so readers see either the old or the complete new table. Tables partitioned by state FIPS,
+    and optionally county FIPS, are updated per county without touching the other partitions.
+    """
+
+    @staticmethod
+    def get_connection_url():
+        """Get the database url from the DB_* settings in Config.
+
+        The psycopg2 driver is named explicitly because COPY uses its cursor.copy_expert, while
+        SQLAlchemy 2.1 maps a bare postgresql:// url to psycopg 3.
+
+        Returns:
+            str: SQLAlchemy database url.
+
+        """
+        return "postgresql+psycopg2://%s:%s@%s:%s/%s" % (
+            Config.DB_USERNAME, Config.DB_PASSWORD, Config.DB_URL, Config.DB_PORT, Config.DB_NAME
+        )
+
+    @staticmethod
+    def get_engine():
+        """Get the shared SQLAlchemy engine, creating it on first use.
+
+        Returns:
+            obj: A SQLAlchemy engine with a connection pool.
+
+        """
+        global _engine
+        if _engine is None:
+            with _engine_lock:
+                if _engine is None:
+                    _engine = create_engine(
+                        PostgresUtil.get_connection_url(),
+                        pool_size=Config.DB_POOL_SIZE,
+                        pool_pre_ping=True,
+                    )
+
+        return _engine
+
+    @staticmethod
+    def close_engine():
+        """Dispose the shared engine and close its pooled connections."""
+        global _engine
+        with _engine_lock:
+            if _engine is not None:
+                _engine.dispose()
+                _engine = None
+
+    @staticmethod
+    def quote_identifier(name):
+        """Quote a table, column or index name for SQL.
+
+        Args:
+            name (str): Identifier.
+
+        Returns:
+            str: Quoted identifier.
+
+        """
+        return '"' + str(name).replace('"', '""') + '"'
+
+    @staticmethod
+    def get_column_types(gdf, srid):
+        """Get the PostgreSQL column types of a GeoDataFrame.
+
+        Args:
+            gdf (obj): GeoPandas GeoDataFrame.
+            srid (int): Spatial reference id of the geometry column.
+
+        Returns:
+            list: A list of (column name, PostgreSQL type) tuples in column order.
+
+        """
+        column_types = []
+        for name, dtype in gdf.dtypes.items():
+            if name == gdf.geometry.name:
+                sql_type = f"geometry(Geometry, {srid})"
+            elif pd.api.types.is_bool_dtype(dtype):
+                sql_type = "boolean"
+            elif pd.api.types.is_integer_dtype(dtype):
+                sql_type = "bigint"
+            elif pd.api.types.is_float_dtype(dtype):
+                sql_type = "double precision"
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                sql_type = "timestamp"
+            else:
+                sql_type = "text"
+            column_types.append((name, sql_type))
+
+        return column_types
+
+    @staticmethod
+    def get_table_column_types(cursor, table):
+        """Get the column types of an existing table from the system catalog.
+
+        Args:
+            cursor (obj): DB-API cursor.
+            table (str): Name of the table.
+
+        Returns:
+            list: A list of (column name, PostgreSQL type) tuples in column order.
+
+        """
+        cursor.execute(
+            "SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped ORDER BY attnum",
+            (PostgresUtil.quote_identifier(table),),
+        )
+
+        return [(name, sql_type) for name, sql_type in cursor.fetchall()]
+
+    @staticmethod
+    def align_columns(gdf, column_types):
+        """Reindex and cast a GeoDataFrame to the columns of a table before COPY.
+
+        Chunks and counties may differ from the frame the table was created from, e.g. an integer
+        column is float in a frame with nulls, or a property is missing in some frames. Missing
+        columns are loaded as nulls and columns the table does not have are dropped with a warning.
+
+        Args:
+            gdf (obj): GeoPandas GeoDataFrame.
+            column_types (list): (column name, PostgreSQL type) tuples of the table, e.g. from
+                get_column_types or get_table_column_types.
+
+        Returns:
+            obj: GeoPandas GeoDataFrame with the columns of the table in table order.
+
+        Raises:
+            ValueError: If the geometry column is not in the table or a column can not be cast to its type.
+
+        """
+        column_names = [name for name, _ in column_types]
+        if gdf.geometry.name not in column_names:
+            raise ValueError(f"The geometry column '{gdf.geometry.name}' is not a column of the table.")
+        extra_columns = [name for name in gdf.columns if name not in column_names]
+        if extra_columns:
+            logger.warning("Dropping columns that are not in the table: " + ", ".join(map(str, extra_columns)))
+
+        gdf = gdf.reindex(columns=column_names)
+        for name, sql_type in column_types:
+            column = gdf[name]
+            try:
+                if sql_type in ("bigint", "integer", "smallint"):
+                    # integer columns with nulls are float, which COPY would write as 1.0
+                    if not pd.api.types.is_integer_dtype(column):
+                        gdf[name] = column.astype("Int64")
+                elif sql_type in ("double precision", "real") or sql_type.startswith("numeric"):
+                    if not pd.api.types.is_float_dtype(column):
+                        gdf[name] = column.astype("float64")
+                elif sql_type == "boolean":
+                    if not pd.api.types.is_bool_dtype(column):
+                        gdf[name] = column.astype("boolean")
+                elif sql_type.startswith("timestamp"):
+                    if not pd.api.types.is_datetime64_any_dtype(column):
+                        gdf[name] = pd.to_datetime(column)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Column '{name}' can not be cast to {sql_type}: {e}") from e
+
+        return gdf
+
+    @staticmethod
+    def get_srid(gdf):
+        """Get the spatial reference id of a GeoDataFrame, EPSG 4326 if it has no CRS.
+
+        Args:
+            gdf (obj): GeoPandas GeoDataFrame.
+
+        Returns:
+            int: Spatial reference id.
+
+        """
+        if gdf.crs is None or gdf.crs.to_epsg() is None:
+            return 4326
+
+        return gdf.crs.to_epsg()
+
+    @staticmethod
+    def write_copy_buffer(gdf, srid):
+        """Encode a GeoDataFrame as csv for COPY with the geometries as hex EWKB.
+
+        Args:
+            gdf (obj): GeoPandas GeoDataFrame.
+            srid (int): Spatial reference id written into the geometries.
+
+        Returns:
+            obj: A StringIO holding the rows.
+
+        """
+        geometry_name = gdf.geometry.name
+        df = pd.DataFrame(gdf)
+        geometries = shapely.set_srid(gdf.geometry.values.to_numpy(), srid)
+        df[geometry_name] = shapely.to_wkb(geometries, hex=True, include_srid=True)
+
+        buffer = io.StringIO()
+        df.to_csv(buffer, header=False, index=False)
+        buffer.seek(0)
+
+        return buffer
+
+    @staticmethod
+    def iter_chunks(gdfs, chunk_size):
+        """Split GeoDataFrames into chunks of at most chunk_size rows without null geometries.
+
+        Args:
+            gdfs (obj): A GeoDataFrame or an iterable of GeoDataFrames, e.g. DataUtil.iter_geopkg_batches.
+            chunk_size (int): Maximum number of rows per chunk.
+
+        Returns:
+            generator: GeoDataFrames.
+
+        """
+        if isinstance(gdfs, gpd.GeoDataFrame):
+            gdfs = [gdfs]
+
+        for gdf in gdfs:
+            null_count = gdf.geometry.isna().sum()
+            if null_count:
+                print('Dropping ' + str(null_count) + ' nulls.')
+                gdf = gdf[gdf.geometry.notna()]
+            for start in range(0, len(gdf), chunk_size):
+                yield gdf.iloc[start:start + chunk_size]
+
+    @staticmethod
+    def copy_gdf(cursor, table, gdf, srid):
+        """Copy the rows of a GeoDataFrame into an existing table.
+
+        Args:
+            cursor (obj): DB-API cursor of a psycopg2 connection.
+            table (str): Name of the table.
+            gdf (obj): GeoPandas GeoDataFrame with the columns of the table.
+            srid (int): Spatial reference id of the geometry column.
+
+        """
+        columns = ", ".join(PostgresUtil.quote_identifier(name) for name in gdf.columns)
+        cursor.copy_expert(
+            f"COPY {PostgresUtil.quote_identifier(table)} ({columns}) FROM STDIN WITH (FORMAT csv)",
+            PostgresUtil.write_copy_buffer(gdf, srid),
+        )
+
+    @staticmethod
+    def create_indexes(cursor, table, geometry_name, index_columns, analyze=True):
+        """Create a GiST index on the geometry column and B-tree indexes on attribute columns.
+
+        Args:
+            cursor (obj): DB-API cursor.
+            table (str): Name of the table.
+            geometry_name (str): Name of the geometry column.
+            index_columns (list): Names of the attribute columns to index.
+            analyze (bool): Update the planner statistics of the table afterwards.
+
+        Returns:
+            list: Names of the created indexes.
+
+        """
+        quoted_table = PostgresUtil.quote_identifier(table)
+        index_names = []
+        for column, method in [(geometry_name, "GIST")] + [(column, "BTREE") for column in index_columns]:
+            index_name = f"{table}_{column}_idx"
+            cursor.execute(
+                f"CREATE INDEX {PostgresUtil.quote_identifier(index_name)} ON {quoted_table} "
+                f"USING {method} ({PostgresUtil.quote_identifier(column)})"
+            )
+            index_names.append(index_name)
+        if analyze:
+            cursor.execute(f"ANALYZE {quoted_table}")
+
+        return index_names
+
+    @staticmethod
+    def bulk_load(gdfs, table="nsi_raw", index_columns=("fips", "statefips", "countyfips"), chunk_size=None):
+        """Replace a table with the rows of GeoDataFrames using COPY.
+
+        The rows are copied into a staging table, which is indexed and then renamed to the target
+        table in the same transaction. If anything fails, the transaction is rolled back and the
+        existing table is left untouched. The first chunk defines the columns of the table and the
+        later chunks are aligned to them with align_columns.
+
+        Args:
+            gdfs (obj): A GeoDataFrame or an iterable of GeoDataFrames with the same columns.
+            table (str): Name of the target table.
+            index_columns (list): Attribute columns that get a B-tree index if they exist.
+            chunk_size (int): Maximum number of rows per COPY. Defaults to Config.DB_COPY_CHUNK_SIZE.
+
+        Returns:
+            int: Number of loaded rows.
+
+        """
+        chunk_size = chunk_size or Config.DB_COPY_CHUNK_SIZE
+        staging_table = table + "_staging"
+
+        connection = PostgresUtil.get_engine().raw_connection()
+        try:
+            cursor = connection.cursor()
+            row_count = 0
+            srid = None
+            geometry_name = None
+            column_types = None
+            for chunk in PostgresUtil.iter_chunks(gdfs, chunk_size):
+                if srid is None:
+                    # the first chunk defines the table, the later ones are aligned to it
+                    srid = PostgresUtil.get_srid(chunk)
+                    geometry_name = chunk.geometry.name
+                    column_types = PostgresUtil.get_column_types(chunk, srid)
+                    columns = ", ".join(
+                        f"{PostgresUtil.quote_identifier(name)} {sql_type}" for name, sql_type in column_types
+                    )
+                    cursor.execute(f"DROP TABLE IF EXISTS {PostgresUtil.quote_identifier(staging_table)}")
+                    cursor.execute(f"CREATE TABLE {PostgresUtil.quote_identifier(staging_table)} ({columns})")
+
+                PostgresUtil.copy_gdf(cursor, staging_table, PostgresUtil.align_columns(chunk, column_types), srid)
+                row_count += len(chunk)
+                logger.debug("Copied " + str(row_count) + " rows to " + staging_table)
+
+            if column_types is None:
+                print("No rows to upload")
+                connection.rollback()
+                return 0
+
+            index_columns = [column for column in index_columns if column in dict(column_types)]
+            index_names = PostgresUtil.create_indexes(cursor, staging_table, geometry_name, index_columns)
+
+            # swap the tables and index names atomically
+            cursor.execute(f"DROP TABLE IF EXISTS {PostgresUtil.quote_identifier(table)}")
+            cursor.execute(
+                f"ALTER TABLE {PostgresUtil.quote_identifier(staging_table)} "
+                f"RENAME TO {PostgresUtil.quote_identifier(table)}"
+            )
+            for index_name in index_names:
+                cursor.execute(
+                    f"ALTER INDEX {PostgresUtil.quote_identifier(index_name)} "
+                    f"RENAME TO {PostgresUtil.quote_identifier(table + index_name[len(staging_table):])}"
+                )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        return row_count
+
+    @staticmethod
+    def append(gdfs, table="nsi_raw", chunk_size=None):
+        """Append the rows of GeoDataFrames to an existing table using COPY.
+
+        Args:
+            gdfs (obj): A GeoDataFrame or an iterable of GeoDataFrames, aligned to the columns of the table.
+            table (str): Name of the table.
+            chunk_size (int): Maximum number of rows per COPY. Defaults to Config.DB_COPY_CHUNK_SIZE.
+
+        Returns:
+            int: Number of loaded rows.
+
+        """
+        connection = PostgresUtil.get_engine().raw_connection()
+        try:
+            cursor = connection.cursor()
+            column_types = PostgresUtil.get_table_column_types(cursor, table)
+            if not column_types:
+                raise ValueError(f"Table '{table}' does not exist, create it with bulk_load.")
+            row_count = 0
+            for chunk in PostgresUtil.iter_chunks(gdfs, chunk_size or Config.DB_COPY_CHUNK_SIZE):
+                chunk = PostgresUtil.align_columns(chunk, column_types)
+                PostgresUtil.copy_gdf(cursor, table, chunk, PostgresUtil.get_srid(chunk))
+                row_count += len(chunk)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        return row_count
+
+    @staticmethod
+    def get_table_kind(cursor, table):
+        """Get the kind of a table from the system catalog.
+
+        Args:
+            cursor (obj): DB-API cursor.
+            table (str): Name of the table.
+
+        Returns:
+            str: 'r' for a regular table, 'p' for a partitioned table or None if it does not exist.
+
+        """
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+                       (PostgresUtil.quote_identifier(table),))
+        row = cursor.fetchone()
+
+        return None if row is None else row[0]
+
+    @staticmethod
+    def create_partitioned_table(cursor, table, gdf, srid, index_columns=("fips", "statefips", "countyfips")):
+        """Create a table partitioned by state FIPS with the columns of a GeoDataFrame.
+
+        The indexes are created on the partitioned table, so PostgreSQL creates them on every partition.
+
+        Args:
+            cursor (obj): DB-API cursor.
+            table (str): Name of the table.
+            gdf (obj): GeoPandas GeoDataFrame with a statefips column.
+            srid (int): Spatial reference id of the geometry column.
+            index_columns (list): Attribute columns that get a B-tree index if they exist.
+
+        """
+        columns = ", ".join(
+            f"{PostgresUtil.quote_identifier(name)} {sql_type}"
+            for name, sql_type in PostgresUtil.get_column_types(gdf, srid)
+        )
+        cursor.execute(
+            f"CREATE TABLE {PostgresUtil.quote_identifier(table)} ({columns}) PARTITION BY LIST (statefips)"
+        )
+        index_columns = [column for column in index_columns if column in gdf.columns]
+        PostgresUtil.create_indexes(cursor, table, gdf.geometry.name, index_columns, analyze=False)
+
+    @staticmethod
+    def create_partitions(cursor, table, fips_list, partition_by_county=False):
+        """Create the missing state and county partitions of a partitioned table.
+
+        State partitions are named <table>_<state fips> and county partitions <table>_<county fips>.
+        The layout of an existing state partition is kept, partition_by_county only applies to new ones.
+
+        Args:
+            cursor (obj): DB-API cursor.
+            table (str): Name of the partitioned table.
+            fips_list (list): County FIPS codes (e.g., ['15005', '29001']).
+            partition_by_county (bool): Sub-partition new state partitions by county FIPS.
+
+        Returns:
+            dict: (partition name, True if it only holds the county) of each county, keyed by FIPS code.
+
+        """
+        partitions = {}
+        state_by_county = {}
+        for fips in fips_list:
+            state_fips = fips[:2]
+            state_table = f"{table}_{state_fips}"
+            if state_fips not in state_by_county:
+                kind = PostgresUtil.get_table_kind(cursor, state_table)
+                if kind is None:
+                    cursor.execute(
+                        f"CREATE TABLE {PostgresUtil.quote_identifier(state_table)} "
+                        f"PARTITION OF {PostgresUtil.quote_identifier(table)} FOR VALUES IN (%s)"
+                        + (" PARTITION BY LIST (fips)" if partition_by_county else ""),
+                        (state_fips,),
+                    )
+                    state_by_county[state_fips] = partition_by_county
+                else:
+                    state_by_county[state_fips] = kind == "p"
+
+            if not state_by_county[state_fips]:
+                partitions[fips] = (state_table, False)
+                continue
+
+            county_table = f"{table}_{fips}"
+            if PostgresUtil.get_table_kind(cursor, county_table) is None:
+                cursor.execute(
+                    f"CREATE TABLE {PostgresUtil.quote_identifier(county_table)} "
+                    f"PARTITION OF {PostgresUtil.quote_identifier(state_table)} FOR VALUES IN (%s)",
+                    (fips,),
+                )
+            partitions[fips] = (county_table, True)
+
+        return partitions
+
+    @staticmethod
+    def replace_county(table, fips, gdf, partition, by_county, chunk_size=None):
+        """Replace the rows of one county in its partition in a single transaction.
+
+        A county partition is truncated, a state partition only loses the rows of the county.
+        The load time and row count of the county are recorded in the <table>_counties table.
+
+        Args:
+            table (str): Name of the partitioned table.
+            fips (str): County FIPS code.
+            gdf (obj): GeoPandas GeoDataFrame with the structures of the county in the columns of the table.
+            partition (str): Name of the partition holding the county.
+            by_county (bool): True if the partition only holds this county.
+            chunk_size (int): Maximum number of rows per COPY. Defaults to Config.DB_COPY_CHUNK_SIZE.
+
+        Returns:
+            int: Number of loaded rows.
+
+        """
+        quoted_partition = PostgresUtil.quote_identifier(partition)
+        connection = PostgresUtil.get_engine().raw_connection()
+        try:
+            cursor = connection.cursor()
+            if by_county:
+                cursor.execute(f"TRUNCATE {quoted_partition}")
+            else:
+                cursor.execute(f"DELETE FROM {quoted_partition} WHERE fips = %s", (fips,))
+
+            row_count = 0
+            for chunk in PostgresUtil.iter_chunks(gdf, chunk_size or Config.DB_COPY_CHUNK_SIZE):
+                PostgresUtil.copy_gdf(cursor, partition, chunk, PostgresUtil.get_srid(chunk))
+                row_count += len(chunk)
+            cursor.execute(
+                f"INSERT INTO {PostgresUtil.quote_identifier(table + '_counties')} (fips, row_count, loaded_at) "
+                "VALUES (%s, %s, now()) "
+                "ON CONFLICT (fips) DO UPDATE SET row_count = EXCLUDED.row_count, loaded_at = EXCLUDED.loaded_at",
+                (fips, row_count),
+            )
+            cursor.execute(f"ANALYZE {quoted_partition}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        logger.debug("Replaced " + str(row_count) + " rows of " + fips + " in " + partition)
+
+        return row_count
+
+    @staticmethod
+    def prepare_partitioned_table(table, gdfs, partition_by_county=False):
+        """Create a partitioned table, its missing partitions and its county registry in one transaction.
+
+        Args:
+            table (str): Name of the partitioned table.
+            gdfs (dict): GeoDataFrames keyed by county FIPS code.
+            partition_by_county (bool): Sub-partition new state partitions by county FIPS.
+
+        Returns:
+            dict: (partition name, True if it only holds the county) of each county, keyed by FIPS code.
+            list: (column name, PostgreSQL type) tuples of the table in column order.
+
+        """
+        connection = PostgresUtil.get_engine().raw_connection()
+        try:
+            cursor = connection.cursor()
+            kind = PostgresUtil.get_table_kind(cursor, table)
+            if kind is None:
+                # an empty county may lack the attribute columns
+                gdf = max(gdfs.values(), key=len)
+                PostgresUtil.create_partitioned_table(cursor, table, gdf, PostgresUtil.get_srid(gdf))
+            elif kind != "p":
+                raise ValueError(f"Table '{table}' is not partitioned, drop it or replace it with bulk_load.")
+            partitions = PostgresUtil.create_partitions(cursor, table, list(gdfs), partition_by_county)
+            column_types = PostgresUtil.get_table_column_types(cursor, table)
+            # counties loaded so far, including the ones without structures
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {PostgresUtil.quote_identifier(table + '_counties')} "
+                "(fips text PRIMARY KEY, row_count bigint, loaded_at timestamptz)"
+            )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        return partitions, column_types
+
+    @staticmethod
+    def upsert_counties(gdfs, table=None, partition_by_county=False, max_workers=None, chunk_size=None):
+        """Replace the rows of the given counties in a table partitioned by state FIPS.
+
+        The table and its partitions are created when missing. Each county is then replaced in its
+        own transaction, concurrently over the pooled connections, while the rows of all other
+        counties are left untouched. Each county is aligned to the columns of the table first, so
+        counties with other nullability or properties than the one that created the table can be
+        loaded. A county that fails is rolled back without affecting the others
+        and is reported in the returned failures. If the table can not be prepared, e.g. because
+        the database can not be reached, every county is reported as failed.
+
+        Args:
+            gdfs (obj): A GeoDataFrame with fips and statefips columns, e.g. from
+                NsiParser.create_nsi_gdf_by_counties_fips_list, or a dict of GeoDataFrames keyed by county FIPS.
+            table (str): Name of the partitioned table. Defaults to Config.NSI_DB_TABLE.
+            partition_by_county (bool): Sub-partition new state partitions by county FIPS,
+                so a county is replaced by truncating its partition instead of deleting its rows.
+            max_workers (int): Maximum number of counties loaded at a time. Defaults to Config.DB_POOL_SIZE.
+            chunk_size (int): Maximum number of rows per COPY. Defaults to Config.DB_COPY_CHUNK_SIZE.
+
+        Returns:
+            dict: Number of loaded rows of the committed counties keyed by FIPS code.
+            dict: Error messages of the failed counties keyed by FIPS code.
+
+        """
+        table = table or Config.NSI_DB_TABLE
+        if isinstance(gdfs, gpd.GeoDataFrame):
+            if "fips" not in gdfs.columns:
+                raise ValueError("The GeoDataFrame needs a fips column to be partitioned.")
+            gdfs = {str(fips): gdf for fips, gdf in gdfs.groupby("fips", observed=True, sort=False)}
+
+        for fips, gdf in gdfs.items():
+            if len(fips) != 5 or not fips.isdigit():
+                raise ValueError(f"Invalid county FIPS code '{fips}'.")
+            if "statefips" not in gdf.columns:
+                raise ValueError(f"The GeoDataFrame of FIPS {fips} needs a statefips column to be partitioned.")
+        if not gdfs:
+            print("No rows to upload")
+            return {}, {}
+
+        try:
+            partitions, column_types = PostgresUtil.prepare_partitioned_table(table, gdfs, partition_by_county)
+        except Exception as e:
+            # nothing was committed
+            logger.error("Failed to prepare table " + table + ": " + str(e))
+            return {}, {fips: str(e) for fips in gdfs}
+
+        def load(fips):
+            partition, by_county = partitions[fips]
+            gdf = PostgresUtil.align_columns(gdfs[fips], column_types)
+            return PostgresUtil.replace_county(table, fips, gdf, partition, by_county, chunk_size)
+
+        with ThreadPoolExecutor(max_workers=max_workers or Config.DB_POOL_SIZE) as executor:
+            futures = {fips: executor.submit(load, fips) for fips in gdfs}
+
+        row_counts = {}
+        failures = {}
+        for fips, future in futures.items():
+            try:
+                row_counts[fips] = future.result()
+            except Exception as e:
+                logger.error("Failed to upload FIPS " + fips + ": " + str(e))
+                failures[fips] = str(e)
+
+        return row_counts, failures
+
+    @staticmethod
+    def get_loaded_counties(fips_list, table=None, max_age=None):
+        """Get the counties of a list that were loaded with upsert_counties.
+
+        Args:
+            fips_list (list): County FIPS codes (e.g., ['15005', '29001']).
+            table (str): Name of the partitioned table. Defaults to Config.NSI_DB_TABLE.
+            max_age (float): Only return counties loaded less than max_age seconds ago. None returns all.
+
+        Returns:
+            list: The loaded FIPS codes.
+
+        Raises:
+            ValueError: If the table exists but is not partitioned, e.g. because it was created by bulk_load.
+
+        """
+        table = table or Config.NSI_DB_TABLE
+        counties_table = table + "_counties"
+        with PostgresUtil.get_engine().connect() as connection:
+            kind = connection.exec_driver_sql(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%(table)s)",
+                {"table": PostgresUtil.quote_identifier(table)},
+            ).scalar()
+            if kind is not None and kind != "p":
+                raise ValueError(f"Table '{table}' is not partitioned, drop it or replace it with bulk_load.")
+
+            exists = connection.exec_driver_sql(
+                "SELECT to_regclass(%(table)s) IS NOT NULL", {"table": PostgresUtil.quote_identifier(counties_table)}
+            ).scalar()
+            if not exists:
+                return []
+
+            sql = f"SELECT fips FROM {PostgresUtil.quote_identifier(counties_table)} WHERE fips = ANY(%(fips)s)"
+            if max_age is not None:
+                sql += " AND loaded_at > now() - make_interval(secs => %(max_age)s)"
+            rows = connection.exec_driver_sql(sql, {"fips": list(fips_list), "max_age": max_age}).all()
+
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def read_counties(fips_list, table=None, geometry_name="geometry"):
+        """Read the rows of counties from a table partitioned by state FIPS.
+
+        The state FIPS codes are part of the query, so only the partitions of these states are
+        scanned, and the rows of the counties are found with the fips index.
+
+        Args:
+            fips_list (list): County FIPS codes (e.g., ['15005', '29001']).
+            table (str): Name of the partitioned table. Defaults to Config.NSI_DB_TABLE.
+            geometry_name (str): Name of the geometry column.
+
+        Returns:
+            dict: GeoPandas GeoDataFrames keyed by FIPS code, empty for counties without rows.
+
+        """
+        table = table or Config.NSI_DB_TABLE
+        fips_list = list(fips_list)
+        if not fips_list:
+            return {}
+
+        sql = (
+            f"SELECT * FROM {PostgresUtil.quote_identifier(table)} "
+            "WHERE statefips = ANY(%(states)s) AND fips = ANY(%(fips)s)"
+        )
+        params = {"states": sorted({fips[:2] for fips in fips_list}), "fips": fips_list}
+        with PostgresUtil.get_engine().connect() as connection:
+            gdf = gpd.read_postgis(sql, connection, geom_col=geometry_name, params=params)
+
+        gdfs = {fips: gdf.iloc[0:0] for fips in fips_list}
+        gdfs.update({fips: county_gdf.reset_index(drop=True) for fips, county_gdf in gdf.groupby("fips", sort=False)})
+
+        return gdfs
@@ -0,0 +1,71 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import time
+
+import geopandas as gpd
+import pytest
+import requests
+from shapely.geometry import Point
+
+from pyincore_data.utils.datautil import DataUtil
+
+
+class FakeResponse:
+    """Stand-in for a requests response, also usable as the context manager of a streamed request."""
+
+    def __init__(self, content=b"", status_code=200, headers=None, chunk_size=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.chunk_size = chunk_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+    def iter_content(self, chunk_size=1):
+        chunk_size = self.chunk_size or max(len(self.content), 1)
+        return (self.content[i:i + chunk_size] for i in range(0, len(self.content), chunk_size))
+
+
+class FakeNsiService:
+    """Stand-in for DataUtil.get_features_by_fips with one structure per county whose fd_id is the FIPS code."""
+
+    def __init__(self):
+        self.requested = []
+        self.failing = set()
+        self.delays = {}
+
+    def get_features_by_fips(self, fips, **kwargs):
+        self.requested.append(fips)
+        if fips in self.failing:
+            raise requests.HTTPError("500 Server Error")
+        time.sleep(self.delays.get(fips, 0))
+        gdf = gpd.GeoDataFrame({"fd_id": [int(fips)]}, geometry=[Point(-155.5, 19.5)], crs="EPSG:4326")
+
+        return DataUtil.add_columns_to_gdf(gdf, fips)
+
+
+@pytest.fixture
+def fake_response():
+    """The FakeResponse class, to build responses returned by a patched HttpUtil.get."""
+    return FakeResponse
+
+
+@pytest.fixture
+def nsi_service(monkeypatch):
+    """A FakeNsiService patched in for DataUtil.get_features_by_fips."""
+    service = FakeNsiService()
+    monkeypatch.setattr(DataUtil, "get_features_by_fips", service.get_features_by_fips)
+
+    return service
@@ -4,9 +4,23 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
+import json
+import os
+import zipfile
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
 import pytest
+from shapely.geometry import Point
 
+from pyincore_data.config import Config
+from pyincore_data import nsiparser
 from pyincore_data.nsiparser import NsiParser
+from pyincore_data.utils.cacheutil import CacheUtil
+from pyincore_data.utils.datautil import DataUtil
+from pyincore_data.utils.httputil import HttpUtil
+from pyincore_data.utils.postgresutil import PostgresUtil
 
 
 @pytest.fixture
@@ -28,6 +42,161 @@ def test_create_nsi_gdf_by_counties_fips_list():
     assert merged_gdf.shape[0] > 0
 
 
+def test_create_nsi_gdf_by_counties_fips_list_reports_failures(nsi_service):
+    nsi_service.failing.add("29001")
+    # later counties answer first
+    nsi_service.delays["15001"] = 0.02
+
+    merged_gdf = NsiParser.create_nsi_gdf_by_counties_fips_list(["15001", "29001", "15003"], max_workers=3)
+
+    assert merged_gdf.attrs["failed_fips"] == ["29001"]
+    assert merged_gdf["fd_id"].tolist() == [15001, 15003]
+    assert pd.api.types.is_string_dtype(merged_gdf["fips"])
+    assert merged_gdf.crs.to_epsg() == 4326
+
+
+def test_create_nsi_gdf_by_counties_fips_list_reports_cache_failures(tmp_path, monkeypatch, fake_response):
+    monkeypatch.setattr(Config, "CACHE_DIR", str(tmp_path))
+    body = json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-155.1, 19.7]}, "properties": {"fd_id": 1}}
+    ]}).encode()
+    put = CacheUtil.put
+
+    def fake_put(cache, key, ext, writer, **meta):
+        if key.endswith("15003"):
+            raise pa.ArrowNotImplementedError("unsupported column type")
+        if key.endswith("15005"):
+            raise OSError("No space left on device")
+        return put(cache, key, ext, writer, **meta)
+
+    monkeypatch.setattr(HttpUtil, "get", lambda url, **kwargs: fake_response(body))
+    monkeypatch.setattr(CacheUtil, "put", fake_put)
+    # a corrupt cache entry of one county
+    DataUtil.get_nsi_cache().put(
+        CacheUtil.normalize_url(Config.NSI_URL_FIPS + "15001"), "parquet", lambda path: open(path, "wb").close()
+    )
+
+    merged_gdf = NsiParser.create_nsi_gdf_by_counties_fips_list(["15001", "15003", "15005", "15007"])
+
+    # failed cache writes do not fail a county, a failed cache read fails only its county
+    assert merged_gdf.attrs["failed_fips"] == ["15001"]
+    assert merged_gdf["fips"].tolist() == ["15003", "15005", "15007"]
+
+
+def test_create_nsi_gdf_from_state_file(tmp_path, nsi_service):
+    gpkg_file = str(tmp_path / "nsi_2022_15.gpkg")
+    gpd.GeoDataFrame(
+        {
+            "fd_id": [1, 2, 3, 4],
+            "occtype": ["RES1", "COM1", "RES1", "RES2"],
+            "cbfips": ["150010201001001", "150030201001001", "150010201001002", "150070201001001"],
+        },
+        geometry=[Point(-155.1, 19.7), Point(-157.8, 21.3), Point(-155.2, 19.8), Point(-159.5, 22.0)],
+        crs="EPSG:4326",
+    ).to_file(gpkg_file, layer="nsi", driver="GPKG")
+    state_file = NsiParser.get_nsi_state_file_path("15", str(tmp_path))
+    with zipfile.ZipFile(state_file, "w") as zip_obj:
+        zip_obj.write(gpkg_file, "nsi_2022_15.gpkg")
+    os.remove(gpkg_file)
+
+    gdf = NsiParser.create_nsi_gdf_by_counties_from_state_file(state_file, ["15001", "15007"], columns=["fd_id"])
+    assert gdf["fd_id"].tolist() == [1, 3, 4]
+    assert gdf.columns.tolist() == ["fd_id", "cbfips", "geometry", "guid", "fips", "statefips", "countyfips"]
+    assert gdf["fips"].tolist() == ["15001", "15001", "15007"]
+
+    # counties of states without a downloaded file still come from the NSI service
+    merged_gdf = NsiParser.create_nsi_gdf_by_counties_fips_list(
+        ["29001", "15003", "15001"], state_dir=str(tmp_path)
+    )
+    assert nsi_service.requested == ["29001"]
+    assert merged_gdf["fd_id"].tolist() == [29001, 2, 1, 3]
+    assert merged_gdf["fips"].tolist() == ["29001", "15003", "15001", "15001"]
+
+
+def test_nsi_db_read_through(monkeypatch, nsi_service):
+    upsert_counties = PostgresUtil.upsert_counties
+    # a dict of county GeoDataFrames stands in for the PostGIS table
+    database = {}
+    remote_fips = nsi_service.requested
+
+    def fake_upsert_counties(gdfs, table=None, **kwargs):
+        database.update(gdfs)
+        return {fips: len(gdf) for fips, gdf in gdfs.items()}, {}
+
+    monkeypatch.setattr(PostgresUtil, "get_loaded_counties", lambda fips_list, *args, **kwargs: [
+        fips for fips in fips_list if fips in database
+    ])
+    monkeypatch.setattr(PostgresUtil, "read_counties", lambda fips_list, *args: {
+        fips: database[fips].astype({"fips": str}) for fips in fips_list
+    })
+    monkeypatch.setattr(PostgresUtil, "upsert_counties", fake_upsert_counties)
+
+    gdf = NsiParser.create_nsi_gdf_by_county_fips("15001", use_db=True)
+    assert NsiParser.create_nsi_gdf_by_county_fips("15001", use_db=True)["guid"].tolist() == gdf["guid"].tolist()
+    assert remote_fips == ["15001"]
+
+    # only the missing counties are fetched and written back
+    merged_gdf = NsiParser.create_nsi_gdf_by_counties_fips_list(["15003", "15001", "29001"], use_db=True)
+    assert remote_fips[0] == "15001" and sorted(remote_fips[1:]) == ["15003", "29001"]
+    assert sorted(database) == ["15001", "15003", "29001"]
+    assert merged_gdf["fd_id"].tolist() == [15003, 15001, 29001]
+    assert pd.api.types.is_string_dtype(merged_gdf["fips"])
+
+    # the service is used if the database can not be reached
+    def fail(*args, **kwargs):
+        raise ImportError("No module named 'psycopg2'")
+
+    monkeypatch.setattr(PostgresUtil, "get_loaded_counties", fail)
+    monkeypatch.setattr(PostgresUtil, "upsert_counties", upsert_counties)
+    monkeypatch.setattr(PostgresUtil, "prepare_partitioned_table", fail)
+    assert NsiParser.create_nsi_gdf_by_county_fips("15001", use_db=True)["fd_id"].tolist() == [15001]
+    assert remote_fips[-1] == "15001"
+
+
+def test_nsi_db_cache_skips_unpartitioned_table(monkeypatch, nsi_service):
+    calls = []
+
+    def fake_get_loaded_counties(fips_list, table=None, **kwargs):
+        calls.append(table)
+        raise ValueError(f"Table '{table}' is not partitioned, drop it or replace it with bulk_load.")
+
+    monkeypatch.setattr(nsiparser, "_unpartitioned_tables", set())
+    monkeypatch.setattr(PostgresUtil, "get_loaded_counties", fake_get_loaded_counties)
+    monkeypatch.setattr(PostgresUtil, "upsert_counties", lambda *args, **kwargs: pytest.fail("write back attempted"))
+
+    # the cache does not share the table of the bulk loads
+    assert Config.NSI_DB_TABLE != "nsi_raw"
+    for _ in range(2):
+        assert NsiParser.create_nsi_gdf_by_county_fips("15001", use_db=True)["fd_id"].tolist() == [15001]
+    # the table is checked once, then the cache is disabled
+    assert calls == [Config.NSI_DB_TABLE]
+
+
+def test_upload_nsi_counties_reports_failed_counties(monkeypatch, nsi_service):
+    nsi_service.failing.add("29001")
+
+    def fake_replace_county(table, fips, gdf, partition, by_county, chunk_size=None):
+        if fips == "15003":
+            raise RuntimeError("deadlock detected")
+        return len(gdf)
+
+    monkeypatch.setattr(PostgresUtil, "prepare_partitioned_table", lambda table, gdfs, partition_by_county: (
+        {fips: (table + "_" + fips[:2], False) for fips in gdfs},
+        PostgresUtil.get_column_types(next(iter(gdfs.values())), 4326),
+    ))
+    monkeypatch.setattr(PostgresUtil, "replace_county", fake_replace_county)
+
+    # the other counties are committed, only the failed ones are reported
+    assert NsiParser.upload_nsi_counties_to_postgres(["15001", "15003", "29001", "15005"]) == ["15003", "29001"]
+
+    def fail(*args):
+        raise ImportError("No module named 'psycopg2'")
+
+    monkeypatch.setattr(PostgresUtil, "prepare_partitioned_table", fail)
+    assert NsiParser.upload_nsi_counties_to_postgres(["15001", "15005"]) == ["15001", "15005"]
+    assert not DataUtil.upload_postgres_gdf({"15001": nsi_service.get_features_by_fips("15001")}, if_exists="upsert")
+
+
 def test_get_county_fips_by_state():
     state = 'illinois'
     fips_list = NsiParser.get_county_fips_by_state(state)
@@ -4,9 +4,24 @@
 # terms of the Mozilla Public License v2.0 which accompanies this distribution,
 # and is available at https://www.mozilla.org/en-US/MPL/2.0/
 
+import json
+import os
+import time
+from io import BytesIO
+from zipfile import ZipFile
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
 import pytest
+from shapely.geometry import box
 
+from pyincore_data import globals as pyincore_globals
 from pyincore_data.censusutil import CensusUtil
+from pyincore_data.censusviz import CensusViz
+from pyincore_data.config import Config
+from pyincore_data.utils.cacheutil import CacheUtil
+from pyincore_data.utils.httputil import HttpUtil
 
 
 @pytest.fixture
@@ -54,3 +69,270 @@ def test_demographic_factors():
     assert (
         social_vulnerability_dem_factors_df.loc[0]["GEO_ID"] == "1500000US481677243004"
     )
+
+
+def test_request_census_api_offline_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_DIR", str(tmp_path))
+    data_url = "https://api.census.gov/data/2010/dec/sf1?get=NAME&for=state:17"
+    api_df = pd.DataFrame(columns=["NAME", "state"], data=[["Illinois", "17"]])
+    CensusUtil.get_census_cache().put(
+        CacheUtil.normalize_url(data_url), "parquet", lambda path: api_df.to_parquet(path)
+    )
+
+    # equivalent url with different parameter order and encoding must hit the same entry
+    api_json, cached_df = CensusUtil.request_census_api(
+        "https://API.census.gov/data/2010/dec/sf1?for=state%3A17&get=NAME", offline=True
+    )
+
+    assert api_json == [["NAME", "state"], ["Illinois", "17"]]
+    assert cached_df["NAME"][0] == "Illinois"
+
+
+def test_get_blockgroupdata_for_dislocation_concurrent_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state_counties = ["01001", "01003", "01005", "01007"]
+
+    def fake_request_census_api(data_url, **kwargs):
+        county = data_url.split("county:")[1]
+        # later counties answer first
+        time.sleep(0.05 * (10 - int(county[-1])))
+        row = ["1500000US01" + county + "0201001", "Block Group 1", "10", "5", "3", "2",
+               "01", county, "020100", "1"]
+        columns = ["GEO_ID", "NAME", "P005001", "P005003", "P005004", "P005010",
+                   "state", "county", "tract", "block group"]
+        return [columns, row], pd.DataFrame(columns=columns, data=[row])
+
+    def fake_download_county_shapefile(state_county, download_dir=None, **kwargs):
+        return gpd.GeoDataFrame(
+            {"GEOID10": [state_county + "0201001"]},
+            geometry=[box(0, 0, 1, 1)],
+            crs="EPSG:4326",
+        )
+
+    monkeypatch.setattr(CensusUtil, "request_census_api", fake_request_census_api)
+    monkeypatch.setattr(CensusUtil, "download_county_shapefile", fake_download_county_shapefile)
+
+    disloc_df, bgmap, out_dataset = CensusUtil.get_blockgroupdata_for_dislocation(
+        state_counties, max_workers=4
+    )
+
+    assert list(disloc_df["bgid"]) == [fips + "0201001" for fips in state_counties]
+
+
+def test_get_blockgroupdata_for_dislocation_lazy_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    columns = ["GEO_ID", "NAME", "P005001", "P005003", "P005004", "P005010", "state", "county", "tract", "block group"]
+    rows = [["1500000US010010201001", "Block Group 1", "10", "5", "3", "2", "01", "001", "020100", "1"]]
+    maps = []
+
+    def fake_create_map(in_gpd, zoom_level=10):
+        maps.append(in_gpd)
+        return "map"
+
+    monkeypatch.setattr(CensusUtil, "request_census_api", lambda data_url, **kwargs: (
+        [columns] + rows, pd.DataFrame(columns=columns, data=rows)))
+    monkeypatch.setattr(CensusUtil, "download_county_shapefile", lambda state_county, **kwargs: gpd.GeoDataFrame(
+        {"GEOID10": [state_county + "0201001"]}, geometry=[box(0, 0, 1, 1)], crs="EPSG:4326"))
+    monkeypatch.setattr(CensusViz, "create_dislocation_ipyleaflet_map_from_gpd", fake_create_map)
+
+    disloc_df, bgmap, out_dataset = CensusUtil.get_blockgroupdata_for_dislocation(["01001"], out_map=False)
+
+    # nothing is rendered or written unless requested
+    assert bgmap is None and maps == []
+    assert list(tmp_path.iterdir()) == []
+    assert out_dataset.get_dataframe_from_shapefile()["bgid"].tolist() == ["010010201001"]
+    # the dataset format matches the file that backs it
+    assert out_dataset.format == "geopackage"
+    shp_data = CensusUtil.create_blockgroupdata_for_dislocation(["01001"], dataset_format="shp")
+    assert shp_data.dataset.format == "shapefile"
+
+    dislocation_data = CensusUtil.create_blockgroupdata_for_dislocation(["01001"], geo_name="test")
+    assert dislocation_data.map == "map" and dislocation_data.map == "map"
+    assert len(maps) == 1
+    dislocation_data.save_csv()
+    assert os.listdir(tmp_path / "program_name") == ["program_name_test.csv"]
+
+
+def test_get_census_data_by_variables_joins_on_geography(monkeypatch):
+    variables = ["GEO_ID"] + ["B01001_%03dE" % i for i in range(1, 60)]
+    assert [len(query) for query in CensusUtil.plan_census_queries(variables)] == [50, 10]
+
+    def fake_request_census_api(data_url, **kwargs):
+        query_variables = data_url.split("get=")[1].split("&")[0].split(",")
+        rows = [[tract + var for var in query_variables] + ["48", "167", tract] for tract in ["724300", "724400"]]
+        if "GEO_ID" not in query_variables:
+            # second response comes back in a different row order
+            rows.reverse()
+        columns = query_variables + ["state", "county", "tract"]
+        return [columns] + rows, pd.DataFrame(columns=columns, data=rows)
+
+    monkeypatch.setattr(CensusUtil, "request_census_api", fake_request_census_api)
+
+    api_df = CensusUtil.get_census_data_by_variables(
+        state="48", county="167", year=2020, data_source="acs/acs5", variables=variables, geo_type="tract:*"
+    )
+
+    assert len(api_df) == 2
+    assert (api_df["GEO_ID"].str[:6] == api_df["B01001_059E"].str[:6]).all()
+
+
+def test_get_census_data_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    columns = ["NAME", "P005001", "state"]
+    rows = [["Illinois", "12830632", "17"]]
+    monkeypatch.setattr(
+        CensusUtil,
+        "request_census_api",
+        lambda data_url, **kwargs: ([columns] + rows, pd.DataFrame(columns=columns, data=rows)),
+    )
+
+    api_json, api_df, out_dataset = CensusUtil.get_census_data(
+        state="17", year="2010", data_source="dec/sf1", columns="NAME,P005001", in_memory=True
+    )
+
+    assert out_dataset.get_dataframe_from_csv()["NAME"][0] == "Illinois"
+    assert out_dataset.format == "table"
+    assert list(tmp_path.iterdir()) == []
+
+    # the csv is only written once the file is requested
+    assert os.path.isfile(out_dataset.get_file_path("csv"))
+    assert out_dataset.get_csv_reader().__next__()["P005001"] == "12830632"
+    out_dataset.delete_temp_folder()
+
+
+def test_get_census_data_in_memory_matches_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    columns = ["GEO_ID", "NAME", "P005001", "state", "county"]
+    rows = [["0500000US17019", "Champaign County", "201081", "17", "019"]]
+    monkeypatch.setattr(
+        CensusUtil,
+        "request_census_api",
+        lambda data_url, **kwargs: ([columns] + rows, pd.DataFrame(columns=columns, data=rows)),
+    )
+    kwargs = dict(state="17", county="019", year="2010", data_source="dec/sf1", columns="GEO_ID,NAME,P005001")
+
+    _, _, csv_dataset = CensusUtil.get_census_data(**kwargs)
+    _, _, memory_dataset = CensusUtil.get_census_data(in_memory=True, **kwargs)
+
+    pd.testing.assert_frame_equal(memory_dataset.get_dataframe_from_csv(), csv_dataset.get_dataframe_from_csv())
+
+
+def test_compute_factors_handles_zero_and_null_values():
+    df = pd.DataFrame(
+        {
+            "B25003_001E": ["10", "0", "-666666666", "4"],
+            "B25003_002E": ["5", "0", "3", "-222222222"],
+        }
+    )
+    factors = {"factor_owner_occupied": pyincore_globals.DEMOGRAPHIC_FACTORS["factor_owner_occupied"]}
+
+    out_factors = CensusUtil.compute_factors(df, factors)["factor_owner_occupied"]
+
+    assert out_factors[0] == 0.5
+    assert np.isnan(out_factors[1:]).all()
+    assert CensusUtil.compute_factors(df, factors, aggregate=True)["factor_owner_occupied"] == 5 / 10
+
+
+def test_coerce_census_dtypes():
+    api_df = pd.DataFrame(
+        columns=["NAME", "B19013_001E", "B01002_001E", "state", "county"],
+        data=[["Block Group 1", "52000", "34.5", "48", "167"], ["Block Group 2", "-666666666", "41.0", "48", "167"]],
+    )
+    variable_types = {"NAME": "string", "B19013_001E": "int", "B01002_001E": "float", "state": None, "county": None}
+
+    typed_df = CensusUtil.coerce_census_dtypes(api_df, variable_types)
+
+    assert typed_df["B19013_001E"].dtype == "Int32"
+    assert typed_df["B19013_001E"].isna().tolist() == [False, True]
+    assert typed_df["B01002_001E"].dtype == "float32"
+    assert typed_df["county"].dtype == "category"
+    assert typed_df["county"][0] == "167"
+    assert typed_df.memory_usage(deep=True).sum() < api_df.memory_usage(deep=True).sum()
+
+
+def test_read_census_json_stream():
+    api_json = [["NAME", "P005001", "state", "county"]] + [
+        ["County %d, Alabama" % i, str(i * 1000), "01", "%03d" % i] for i in range(1, 8)
+    ]
+    api_json[3][1] = None
+    content = json.dumps(api_json).encode("utf-8")
+    # split the document at arbitrary positions, including inside strings and numbers
+    chunks = [content[i: i + 7] for i in range(0, len(content), 7)]
+
+    api_df = CensusUtil.read_census_json_stream(chunks, block_size=2)
+
+    expected_df = pd.DataFrame(columns=api_json[0], data=api_json[1:])
+    pd.testing.assert_frame_equal(api_df, expected_df, check_dtype=False)
+
+    # typed blocks are converted before they are concatenated
+    variable_types = {"NAME": "string", "P005001": "int", "state": None, "county": None}
+    typed_df = CensusUtil.read_census_json_stream(chunks, block_size=2, variable_types=lambda columns: variable_types)
+    pd.testing.assert_frame_equal(typed_df, CensusUtil.coerce_census_dtypes(expected_df, variable_types))
+
+
+def _tiger_zip_content(state_county, tmp_dir):
+    filename = f"tl_2010_{state_county}_bg10"
+    shp_dir = os.path.join(tmp_dir, "shp_" + state_county)
+    os.makedirs(shp_dir, exist_ok=True)
+    gpd.GeoDataFrame(
+        {"GEOID10": [state_county + "0201001", state_county + "0201002"], "ALAND10": [10, 20]},
+        geometry=[box(-88.3, 40.1, -88.2, 40.2), box(-88.2, 40.1, -88.1, 40.2)],
+        crs="EPSG:4269",
+    ).to_file(os.path.join(shp_dir, filename + ".shp"))
+    zip_buffer = BytesIO()
+    with ZipFile(zip_buffer, "w") as zip_obj:
+        for name in os.listdir(shp_dir):
+            zip_obj.write(os.path.join(shp_dir, name), name)
+
+    return zip_buffer.getvalue()
+
+
+def test_download_county_shapefile_cache(tmp_path, monkeypatch, fake_response):
+    monkeypatch.setattr(Config, "CACHE_DIR", str(tmp_path / "cache"))
+    content = _tiger_zip_content("17019", str(tmp_path))
+    downloads = []
+
+    def fake_get(url, **kwargs):
+        downloads.append(url)
+        return fake_response(content)
+
+    monkeypatch.setattr(HttpUtil, "get", fake_get)
+
+    gdf = CensusUtil.download_county_shapefile("17019")
+    cached_gdf = CensusUtil.download_county_shapefile("17019", columns=["GEOID10"], bbox=(-88.15, 40.1, -88.1, 40.2))
+
+    assert len(downloads) == 1
+    assert cached_gdf.crs.to_epsg() == 4326
+    assert gdf["GEOID10"].tolist() == ["170190201001", "170190201002"]
+    assert cached_gdf.columns.tolist() == ["GEOID10", "geometry"]
+    assert cached_gdf["GEOID10"].tolist() == ["170190201002"]
+
+    # without the cache the column selection and bounding box are pushed down to the zip reader
+    uncached_gdf = CensusUtil.download_county_shapefile(
+        "17019", use_cache=False, columns=["GEOID10"], bbox=(-88.15, 40.1, -88.1, 40.2)
+    )
+    assert uncached_gdf.columns.tolist() == ["GEOID10", "geometry"]
+    assert uncached_gdf["GEOID10"].tolist() == ["170190201002"]
+    assert len(downloads) == 2
+
+
+def test_load_county_shapefiles_parallel(tmp_path, monkeypatch, fake_response):
+    monkeypatch.setattr(Config, "CACHE_DIR", str(tmp_path / "cache"))
+    state_counties = ["17019", "17053", "17183"]
+    contents = {state_county: _tiger_zip_content(state_county, str(tmp_path)) for state_county in state_counties}
+
+    def fake_get(url, **kwargs):
+        return fake_response(contents[url.split("_")[-2]])
+
+    monkeypatch.setattr(HttpUtil, "get", fake_get)
+
+    serial_gdfs = CensusUtil.download_couty_shapefile(state_counties, columns=["GEOID10"], parallel=False)
+    # second run decodes the cached geometries in the process pool
+    gdf = CensusUtil.load_county_shapefiles(state_counties, columns=["GEOID10"], parallel=True, max_processes=2)
+    uncached_gdf = CensusUtil.load_county_shapefiles(state_counties, parallel=True, max_processes=2, use_cache=False)
+
+    assert gdf.crs.to_epsg() == 4326
+    assert gdf.columns.tolist() == ["GEOID10", "geometry"]
+    assert gdf["GEOID10"].tolist() == [fips + suffix for fips in state_counties for suffix in ["0201001", "0201002"]]
+    assert gdf.geom_equals_exact(pd.concat(serial_gdfs, ignore_index=True), 1e-9).all()
+    assert gdf.geom_equals_exact(uncached_gdf, 1e-9).all()
@@ -0,0 +1,516 @@
+# Copyright (c) 2025 University of Illinois and others. All rights reserved.
+#
+# This program and the accompanying materials are made available under the
+# terms of the Mozilla Public License v2.0 which accompanies this distribution,
+# and is available at https://www.mozilla.org/en-US/MPL/2.0/
+
+import json
+import os
+import uuid
+import zipfile
+from io import BytesIO
+from types import SimpleNamespace
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+import requests
+import shapely
+from shapely.geometry import Point
+
+from pyincore_data import globals as pyincore_globals
+from pyincore_data.config import Config
+from pyincore_data.nsiparser import NsiParser
+from pyincore_data.utils import fipsutil
+from pyincore_data.utils.cacheutil import CacheUtil
+from pyincore_data.utils.datasetutil import DataFrameDataset
+from pyincore_data.utils.datautil import DataUtil
+from pyincore_data.utils.fipsutil import FipsUtil
+from pyincore_data.utils.geoutil import GeoUtil
+from pyincore_data.utils.httputil import HttpUtil
+from pyincore_data.utils.jsonutil import JsonUtil
+from pyincore_data.utils.postgresutil import PostgresUtil
+
+
+@pytest.fixture
+def client():
+    return pytest.client
+
+
+def test_http_session_is_shared_and_retrying():
+    session = HttpUtil.get_session()
+
+    assert HttpUtil.get_session() is session
+    retry = session.get_adapter("https://api.census.gov").max_retries
+    assert retry.total == Config.HTTP_MAX_RETRIES
+    assert 503 in retry.status_forcelist
+
+    assert HttpUtil.get_timeout("https://api.census.gov/data/2010/dec/sf1") == (
+        Config.HTTP_CONNECT_TIMEOUT,
+        Config.HTTP_HOST_TIMEOUTS["api.census.gov"],
+    )
+    HttpUtil.close_session()
+
+
+@pytest.fixture
+def county_gazetteer(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(fipsutil, "_gazetteers", {})
+    county_table = pd.DataFrame(
+        {
+            "fips": ["17019", "24005", "24510", "11001", "72127"],
+            "state": ["17", "24", "24", "11", "72"],
+            "county": ["019", "005", "510", "001", "127"],
+            "county_name": ["Champaign County", "Baltimore County", "Baltimore city", "District of Columbia",
+                            "San Juan Municipio"],
+            "state_name": ["Illinois", "Maryland", "Maryland", "District of Columbia", "Puerto Rico"],
+        }
+    )
+    CacheUtil("gazetteer").put(
+        CacheUtil.normalize_url(pyincore_globals.COUNTY_FIPS_BASE_URL),
+        "parquet",
+        lambda path: county_table.to_parquet(path),
+    )
+
+
+def test_county_gazetteer_lookup(county_gazetteer):
+    assert NsiParser.get_fips_by_state_and_county("illinois", "champaign") == "17019"
+    assert FipsUtil.get_county_fips("Maryland", "Baltimore") == "24005"
+    assert FipsUtil.get_county_fips("maryland", "baltimore city") == "24510"
+    assert FipsUtil.get_county_fips("District of Columbia", "District of Columbia") == "11001"
+    assert FipsUtil.get_county_fips("Puerto Rico", "San Juan") == "72127"
+    assert FipsUtil.get_county_by_fips("17019")["county_name"] == "Champaign County"
+    assert FipsUtil.get_state_fips("guam") == "66"
+    assert NsiParser.get_county_fips_only_list_by_state("maryland") == ["24005", "24510"]
+
+
+def test_resolve_county_fips(county_gazetteer):
+    counties = pd.DataFrame(
+        {
+            "State": ["Illinois", "MARYLAND", "Maryland", "Illinois", "Puerto Rico"],
+            "County": ["Champaign County", "baltimore", "Baltimore City", "Champain", "San Juan"],
+        }
+    )
+
+    resolved = FipsUtil.resolve_county_fips(counties, state_column="State", county_column="County")
+
+    assert resolved["fips"].tolist() == ["17019", "24005", "24510", None, "72127"]
+    assert resolved["matched"].tolist() == [True, True, True, False, True]
+    assert resolved["candidates"][3] == ["Champaign County, Illinois (17019)"]
+
+    pairs = FipsUtil.resolve_county_fips([("illinois", "champaign")])
+    assert pairs["fips"][0] == "17019"
+
+
+def test_geoparquet_roundtrip(tmp_path):
+    gdf = gpd.GeoDataFrame(
+        {"bgid": ["170190001001", "170190001002", "170190001003"], "percent_hispanic": [1.5, 2.5, 3.5]},
+        geometry=[Point(-88.2, 40.1), Point(-88.3, 40.2), Point(-88.4, 40.3)],
+        crs="EPSG:4326",
+    )
+    out_file = str(tmp_path / "bg.parquet")
+    DataUtil.gdf_to_geoparquet(gdf, out_file, compression="snappy", row_group_size=2)
+
+    assert pq.ParquetFile(out_file).metadata.num_row_groups == 2
+    # column names are not truncated like in shapefiles
+    read_gdf = DataUtil.read_geoparquet_to_gdf(out_file, columns=["percent_hispanic", "geometry"])
+    assert read_gdf.columns.tolist() == ["percent_hispanic", "geometry"]
+    assert read_gdf.crs.to_epsg() == 4326
+    assert read_gdf.geom_equals(gdf.geometry).all()
+
+    dataset = DataFrameDataset(gdf, "ergo:censusdata", name="bg")
+    assert dataset.format == dataset.metadata["format"] == "geopackage"
+    out_dir = os.path.dirname(dataset.local_file_path)
+    assert dataset.local_file_path.endswith("bg.gpkg")
+    with dataset.get_inventory_reader() as inventory:
+        assert [feature["properties"]["bgid"] for feature in inventory] == gdf["bgid"].tolist()
+    # the temporary file is removed with the dataset
+    del dataset
+    assert not os.path.exists(out_dir)
+    assert DataFrameDataset(pd.DataFrame(gdf.drop(columns="geometry")), "ergo:censusdata").format == "table"
+    for file_format in ["csv", "parquet"]:
+        with pytest.raises(ValueError):
+            DataFrameDataset(gdf, "ergo:censusdata", file_format=file_format)
+
+
+def test_geoutil_to_crs():
+    gdf = gpd.GeoDataFrame(
+        {"id": [1, 2]},
+        geometry=[Point(-88.2, 40.1), shapely.box(-88.3, 40.0, -88.1, 40.2)],
+        crs="EPSG:4326",
+    ).to_crs("EPSG:4269")
+
+    result = GeoUtil.to_crs(gdf, 4326)
+
+    assert result.crs == "EPSG:4326"
+    assert result.geom_equals_exact(gdf.to_crs(4326), tolerance=1e-9).all()
+    assert GeoUtil.to_crs(result, 4326) is result
+
+
+def test_add_columns_to_gdf(tmp_path):
+    gdf = gpd.GeoDataFrame(
+        {"occtype": ["RES1", "COM1", "RES3"]},
+        geometry=[Point(-118.2, 34.0), Point(-118.3, 34.1), Point(-118.4, 34.2)],
+        index=[10, 5, 7],
+        crs="EPSG:4326",
+    )
+    gdf = DataUtil.add_columns_to_gdf(gdf, "06037")
+
+    guids = [uuid.UUID(guid) for guid in gdf["guid"]]
+    assert len(set(guids)) == 3
+    assert all(guid.version == 4 and guid.variant == uuid.RFC_4122 for guid in guids)
+    assert pd.api.types.is_string_dtype(gdf["fips"])
+    assert gdf["fips"].tolist() == ["06037"] * 3
+    assert gdf["statefips"].tolist() == ["06"] * 3
+    assert gdf["countyfips"].tolist() == ["037"] * 3
+    # the FIPS columns can be written by the fiona engine, the default of geopandas 0.14
+    pytest.importorskip("fiona")
+    gdf.to_file(str(tmp_path / "nsi.gpkg"), driver="GPKG", engine="fiona")
+    assert gpd.read_file(str(tmp_path / "nsi.gpkg"))["countyfips"].tolist() == ["037"] * 3
+
+
+def test_get_features_by_fips_streams_features(monkeypatch, fake_response):
+    features = [
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-155.1, 19.7]},
+         "properties": {"fd_id": 1, "occtype": "RES1", "val_struct": 100.5}},
+        # properties missing in some features and a feature without geometry
+        {"type": "Feature", "geometry": None, "properties": {"fd_id": 2, "num_story": 2}},
+        {"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]},
+         "properties": {"fd_id": 3, "occtype": "COM1"}},
+    ]
+    body = json.dumps({"type": "FeatureCollection", "features": features}).encode()
+
+    # split the document into small chunks to exercise the incremental decoder
+    monkeypatch.setattr(HttpUtil, "get", lambda url, **kwargs: fake_response(body, chunk_size=7))
+
+    gdf = DataUtil.get_features_by_fips("15001", use_cache=False)
+    expected = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+
+    assert gdf.crs.to_epsg() == 4326
+    assert gdf.columns.tolist()[:5] == expected.columns.tolist()
+    assert gdf["fd_id"].tolist() == [1, 2, 3]
+    assert gdf.geometry.isna().tolist() == [False, True, False]
+    assert gdf.geometry[[0, 2]].geom_equals(expected.geometry[[0, 2]]).all()
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(gdf[["occtype", "val_struct", "num_story"]]),
+        pd.DataFrame(expected[["occtype", "val_struct", "num_story"]]),
+    )
+    assert gdf["fips"].tolist() == ["15001"] * 3
+    assert DataUtil.features_to_gdf(JsonUtil.iter_array_items("[]")).empty
+
+
+def test_nsi_cache_revalidation(tmp_path, monkeypatch, fake_response):
+    monkeypatch.setattr(Config, "CACHE_DIR", str(tmp_path))
+    body = json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-155.1, 19.7]}, "properties": {"fd_id": 1}}
+    ]}).encode()
+    requests_headers = []
+
+    def fake_get(url, headers=None, **kwargs):
+        requests_headers.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            # the body of a not modified response is empty
+            return fake_response(status_code=304)
+        return fake_response(body, headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+
+    monkeypatch.setattr(HttpUtil, "get", fake_get)
+
+    gdf = NsiParser.create_nsi_gdf_by_county_fips("15001")
+    cached_gdf = NsiParser.create_nsi_gdf_by_county_fips("15001")
+    assert len(requests_headers) == 1
+    assert cached_gdf["fd_id"].tolist() == gdf["fd_id"].tolist() == [1]
+
+    # expired entries and explicit refreshes are revalidated with the stored validators
+    monkeypatch.setattr(Config, "NSI_CACHE_TTL", 0)
+    refreshed_gdf = NsiParser.create_nsi_gdf_by_county_fips("15001")
+    assert NsiParser.refresh_nsi_cache(["15001"]) == []
+    assert requests_headers[1:] == [
+        {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    ] * 2
+    assert refreshed_gdf["fd_id"].tolist() == [1]
+    assert refreshed_gdf["fips"].tolist() == ["15001"]
+
+    NsiParser.clear_nsi_cache(["15001"])
+    NsiParser.create_nsi_gdf_by_county_fips("15001")
+    assert requests_headers[-1] == {}
+
+
+def test_download_nsi_data_state_file_resumes(tmp_path, monkeypatch, fake_response):
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zip_obj:
+        zip_obj.writestr("nsi_2022_15.gpkg", os.urandom(100000))
+    content = zip_buffer.getvalue()
+    ranges = []
+    drops = [True]
+
+    class FakeDownloadResponse(fake_response):
+        def __init__(self, headers, drop):
+            start = int(headers["Range"][6:-1]) if "Range" in headers else 0
+            ranges.append(start)
+            body = content[start:]
+            response_headers = {"Content-Length": str(len(body))}
+            if start:
+                response_headers["Content-Range"] = f"bytes {start}-{len(content) - 1}/{len(content)}"
+            super().__init__(body, 206 if start else 200, response_headers, chunk_size=30000)
+            self.drop = drop
+
+        def iter_content(self, chunk_size=1):
+            for i, chunk in enumerate(super().iter_content(chunk_size)):
+                if self.drop and i > 0:
+                    raise requests.ConnectionError("connection dropped")
+                yield chunk
+
+    monkeypatch.setattr(HttpUtil, "get", lambda url, headers=None, **kwargs: FakeDownloadResponse(
+        headers, drop=bool(drops and drops.pop())))
+    out_file = os.path.join(str(tmp_path), "nsi_2022_15.gpkg.zip")
+    progress = []
+
+    with pytest.raises(requests.ConnectionError):
+        DataUtil.download_nsi_data_state_file("15", str(tmp_path))
+    # nothing is visible under the final name until the download is complete
+    assert not os.path.exists(out_file)
+
+    path = DataUtil.download_nsi_data_state_file(
+        "15", str(tmp_path), progress=lambda downloaded, total: progress.append((downloaded, total))
+    )
+
+    assert path == out_file
+    assert ranges == [0, 30000]
+    assert progress[-1] == (len(content), len(content))
+    with open(path, "rb") as f:
+        assert f.read() == content
+    assert os.listdir(str(tmp_path)) == ["nsi_2022_15.gpkg.zip"]
+
+    # corrupt files are rejected and not kept for resuming
+    os.remove(out_file)
+    content = content[:30000] + bytes(len(content) - 30000)
+    assert DataUtil.download_nsi_data_state_files(["15"], str(tmp_path)) == [None]
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_iter_geopkg_batches(tmp_path):
+    gpkg_file = str(tmp_path / "nsi_2022_15.gpkg")
+    gpd.GeoDataFrame(
+        {"fd_id": list(range(10)), "occtype": ["RES1"] * 10, "val_struct": [100.0] * 10},
+        geometry=[Point(-155.0 - i / 10, 19.5) for i in range(10)],
+        crs="EPSG:4326",
+    ).to_file(gpkg_file, layer="nsi", driver="GPKG")
+
+    batches = list(DataUtil.iter_geopkg_batches(gpkg_file, batch_size=4, columns=["fd_id"]))
+
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert all(batch.columns.tolist() == ["fd_id", "geometry"] for batch in batches)
+    assert batches[0].crs.to_epsg() == 4326
+    assert pd.concat(batches)["fd_id"].tolist() == list(range(10))
+    assert batches[2].geometry.x.tolist() == [-155.8, -155.9]
+
+    arrow_batches = list(DataUtil.iter_geopkg_batches(gpkg_file, batch_size=4, where="fd_id >= 8", as_arrow=True))
+    assert [batch.num_rows for batch in arrow_batches] == [2]
+
+    # a batch with nulls keeps the integer type of the column
+    gpd.GeoDataFrame(
+        {"fd_id": pd.array([1, 2, None], dtype="Int64")}, geometry=[Point(-155.0, 19.5)] * 3, crs="EPSG:4326"
+    ).to_file(gpkg_file, layer="nsi", driver="GPKG")
+    batches = list(DataUtil.iter_geopkg_batches(gpkg_file, batch_size=2))
+    assert [str(batch["fd_id"].dtype) for batch in batches] == ["Int64", "Int64"]
+
+
+def _nsi_gdf(count, fips="15001"):
+    gdf = gpd.GeoDataFrame(
+        {"fd_id": list(range(count)), "occtype": ["RES1"] * count, "val_struct": [100.5] * count},
+        geometry=[Point(-155.0 - i / 1000, 19.5) for i in range(count)],
+        crs="EPSG:4326",
+    )
+
+    return DataUtil.add_columns_to_gdf(gdf, fips)
+
+
+def test_postgres_copy_buffer():
+    gdf = _nsi_gdf(3)
+    gdf.loc[1, "occtype"] = None
+
+    assert PostgresUtil.get_column_types(gdf, 4326)[:4] == [
+        ("fd_id", "bigint"), ("occtype", "text"), ("val_struct", "double precision"),
+        ("geometry", "geometry(Geometry, 4326)"),
+    ]
+    rows = PostgresUtil.write_copy_buffer(gdf, 4326).getvalue().splitlines()
+    fields = rows[1].split(",")
+    assert len(rows) == 3
+    assert fields[:3] == ["1", "", "100.5"]
+    # hex EWKB with the srid flag set
+    geometry = shapely.from_wkb(fields[3])
+    assert shapely.get_srid(geometry) == 4326
+    assert geometry.equals(gdf.geometry[1])
+    assert fields[5:] == ["15001", "15", "001"]
+    assert [len(chunk) for chunk in PostgresUtil.iter_chunks([gdf, _nsi_gdf(5)], 2)] == [2, 1, 2, 2, 1]
+
+
+class FakeCopyConnection:
+    """Raw connection recording the statements and COPY rows of PostgresUtil, with the columns of existing tables."""
+
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+        self.statements = []
+        self.copies = []
+        self.committed = False
+        self.row = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if sql.startswith("SELECT attname"):
+            self.row = self.tables.get(params[0].strip('"'), [])
+
+    def fetchall(self):
+        return self.row
+
+    def copy_expert(self, sql, buffer):
+        self.copies.append((sql, buffer.getvalue().splitlines()))
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_postgres_bulk_load_aligns_chunks(monkeypatch):
+    connection = FakeCopyConnection()
+    monkeypatch.setattr(PostgresUtil, "get_engine", lambda: SimpleNamespace(raw_connection=lambda: connection))
+    first_gdf = _nsi_gdf(2)
+    # a later chunk with a null integer, a missing and an extra property
+    second_gdf = _nsi_gdf(2, "15003").drop(columns="occtype").assign(num_story=[1, 2])
+    second_gdf["fd_id"] = [5, None]
+
+    assert PostgresUtil.bulk_load([first_gdf, second_gdf], "nsi_test") == 4
+
+    assert connection.committed
+    assert any('"fd_id" bigint' in sql for sql in connection.statements)
+    column_names = '"fd_id", "occtype", "val_struct", "geometry", "guid", "fips", "statefips", "countyfips"'
+    assert [sql for sql, _ in connection.copies] == [
+        f'COPY "nsi_test_staging" ({column_names}) FROM STDIN WITH (FORMAT csv)'
+    ] * 2
+    assert [row.split(",")[:3] for row in connection.copies[1][1]] == [["5", "", "100.5"], ["", "", "100.5"]]
+
+    # appended chunks are aligned to the columns of the existing table
+    connection = FakeCopyConnection({"nsi_test": PostgresUtil.get_column_types(first_gdf, 4326)})
+    assert PostgresUtil.append(second_gdf, "nsi_test") == 2
+    assert connection.copies[0][1][1].split(",")[:3] == ["", "", "100.5"]
+    with pytest.raises(ValueError):
+        PostgresUtil.append(second_gdf.assign(fd_id=[1.5, 2]), "nsi_test")
+    with pytest.raises(ValueError):
+        PostgresUtil.append(second_gdf, "nsi_missing")
+
+
+def test_postgres_upsert_counties_aligns_counties(monkeypatch):
+    connection = FakeCopyConnection()
+    monkeypatch.setattr(PostgresUtil, "get_engine", lambda: SimpleNamespace(raw_connection=lambda: connection))
+    # the table is created from the county without nulls, the other counties have a null integer
+    # and an extra property
+    null_gdf = _nsi_gdf(2, "15003")
+    null_gdf["fd_id"] = [5, None]
+    gdfs = {"15001": _nsi_gdf(3), "15003": null_gdf, "15005": _nsi_gdf(1, "15005").assign(num_story=[2])}
+    monkeypatch.setattr(PostgresUtil, "prepare_partitioned_table", lambda table, gdfs, partition_by_county: (
+        {fips: (table + "_15", False) for fips in gdfs}, PostgresUtil.get_column_types(gdfs["15001"], 4326)
+    ))
+
+    assert PostgresUtil.upsert_counties(gdfs, "nsi_test") == ({"15001": 3, "15003": 2, "15005": 1}, {})
+
+    rows = [row.split(",") for _, copy_rows in connection.copies for row in copy_rows]
+    assert sorted(row[0] for row in rows if row[5] == "15003") == ["", "5"]
+    assert all(len(row) == 8 for row in rows)
+    assert connection.statements.count('ANALYZE "nsi_test_15"') == 3
+
+
+def test_postgres_bulk_load():
+    pytest.importorskip("psycopg2")
+    if not Config.DB_NAME:
+        pytest.skip("set DB_NAME, DB_USERNAME and DB_PASSWORD to test against a local PostGIS database")
+
+    table = "pyincore_data_test_nsi"
+    assert DataUtil.upload_postgres_gdf(_nsi_gdf(250), table=table)
+    # replacing keeps the table and index names
+    assert PostgresUtil.bulk_load([_nsi_gdf(100), _nsi_gdf(50, "15003")], table, chunk_size=40) == 150
+    assert DataUtil.upload_postgres_gdf(_nsi_gdf(10, "15005"), if_exists="append", table=table)
+
+    engine = PostgresUtil.get_engine()
+    loaded_gdf = gpd.read_postgis(f"SELECT * FROM {table} ORDER BY fips, fd_id", engine, geom_col="geometry")
+    indexes = pd.read_sql(f"SELECT indexname FROM pg_indexes WHERE tablename = '{table}'", engine)
+
+    assert len(loaded_gdf) == 160
+    assert loaded_gdf["fips"].value_counts().to_dict() == {"15001": 100, "15003": 50, "15005": 10}
+    assert loaded_gdf.crs.to_epsg() == 4326
+    assert sorted(indexes["indexname"]) == [
+        f"{table}_countyfips_idx", f"{table}_fips_idx", f"{table}_geometry_idx", f"{table}_statefips_idx"
+    ]
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP TABLE {table}")
+    PostgresUtil.close_engine()
+
+
+def test_postgres_create_partitions():
+    class FakeCursor:
+        def __init__(self, kinds):
+            self.kinds = kinds
+            self.statements = []
+            self.row = None
+
+        def execute(self, sql, params=None):
+            if sql.startswith("SELECT relkind"):
+                kind = self.kinds.get(params[0].strip('"'))
+                self.row = None if kind is None else (kind,)
+            else:
+                self.statements.append((sql, params))
+
+        def fetchone(self):
+            return self.row
+
+    # the existing state partition 15 keeps its layout, the new state 29 is split by county
+    cursor = FakeCursor({"nsi_raw_15": "r"})
+    partitions = PostgresUtil.create_partitions(cursor, "nsi_raw", ["15001", "15003", "29001"], True)
+
+    assert partitions == {
+        "15001": ("nsi_raw_15", False), "15003": ("nsi_raw_15", False), "29001": ("nsi_raw_29001", True)
+    }
+    assert cursor.statements == [
+        ('CREATE TABLE "nsi_raw_29" PARTITION OF "nsi_raw" FOR VALUES IN (%s) PARTITION BY LIST (fips)', ("29",)),
+        ('CREATE TABLE "nsi_raw_29001" PARTITION OF "nsi_raw_29" FOR VALUES IN (%s)', ("29001",)),
+    ]
+    with pytest.raises(ValueError):
+        PostgresUtil.upsert_counties({"1500": _nsi_gdf(1)})
+
+
+def test_postgres_upsert_counties():
+    pytest.importorskip("psycopg2")
+    if not Config.DB_NAME:
+        pytest.skip("set DB_NAME, DB_USERNAME and DB_PASSWORD to test against a local PostGIS database")
+
+    table = "pyincore_data_test_nsi_partitioned"
+    gdf = pd.concat([_nsi_gdf(20), _nsi_gdf(30, "15003"), _nsi_gdf(40, "29001")], ignore_index=True)
+    assert DataUtil.upload_postgres_gdf(gdf, if_exists="upsert", table=table)
+    # only the refreshed counties are replaced, also in new county sub-partitions
+    assert PostgresUtil.upsert_counties(
+        {"15003": _nsi_gdf(5, "15003"), "17019": _nsi_gdf(7, "17019")}, table, partition_by_county=True
+    ) == ({"15003": 5, "17019": 7}, {})
+
+    engine = PostgresUtil.get_engine()
+    counts = pd.read_sql(f"SELECT fips, count(*) AS n FROM {table} GROUP BY fips ORDER BY fips", engine)
+
+    assert dict(zip(counts["fips"], counts["n"])) == {"15001": 20, "15003": 5, "17019": 7, "29001": 40}
+    assert sorted(PostgresUtil.get_loaded_counties(["15003", "17019", "17031"], table, max_age=3600)) == [
+        "15003", "17019"
+    ]
+    county_gdfs = PostgresUtil.read_counties(["15003", "17031"], table)
+    assert len(county_gdfs["15003"]) == 5 and county_gdfs["17031"].empty
+    assert county_gdfs["15003"].crs.to_epsg() == 4326
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP TABLE {table}, {table}_counties")
+    PostgresUtil.close_engine()